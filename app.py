@@ -1,21 +1,47 @@
 import os
+import atexit
 import json
+import time
+import mimetypes
 import smtplib
 import traceback
+import shutil
+import tempfile
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from functools import partial
 from email.message import EmailMessage
 from xai_sdk import Client
 from xai_sdk.chat import user, system
 from urllib import error as urllib_error
 from urllib import request as urllib_request
 
-import pandas as pd
 from logistics_runner import LogisticsRunner
+from dataset_profiler import profile_dataset
+from dataset_reader import read_dataset, is_supported_dataset, supported_extensions_text, ColumnSelectionError
+from static_assets import (
+    content_hash, is_up_to_date, pick_encoding, compress, runtime_encodings, PRECOMPRESSED_SUFFIXES
+)
+from usage_tracker import UsageTracker, empty_counters, merge_counters, summarize
+from sample_datasets import SampleCatalogue, DEFAULT_SAMPLE_DIR
+from memory_budget import plan_dataset_read, available_memory, MemoryBudgetExceeded
+from db_routing import (
+    RoutingSession, TimedQueuePool, REPLICA_BIND_KEY,
+    use_replica, pool_wait_stats, replica_monitor
+)
 from flask import (
     Flask, render_template,
     request, redirect,
-    url_for, flash, jsonify, g
+    url_for, flash, jsonify, g,
+    Response, Request, stream_with_context,
+    abort, send_from_directory
 )
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.security import safe_join
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.exc import SQLAlchemyError
 from flask_bcrypt import Bcrypt
 from flask_login import (
     LoginManager, UserMixin,
@@ -24,7 +50,7 @@ from flask_login import (
 )
 from itsdangerous import URLSafeTimedSerializer, BadSignature, SignatureExpired
 import secrets
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from dotenv import load_dotenv
 
@@ -136,15 +162,65 @@ app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
     "pool_pre_ping": True,
     "pool_recycle": 280,
 }
+
+# Each gunicorn worker has its own pool, and each of its threads can hold one
+# connection, so size the pool per worker from the thread count.
+gunicorn_threads = max(env_int("GUNICORN_THREADS", default=4), 1)
+if not database_uri.startswith("sqlite"):
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"].update({
+        "poolclass": TimedQueuePool,
+        "pool_size": max(env_int("DB_POOL_SIZE", default=gunicorn_threads), 1),
+        "max_overflow": max(env_int("DB_MAX_OVERFLOW", default=max(gunicorn_threads // 2, 2)), 0),
+        "pool_timeout": max(env_int("DB_POOL_TIMEOUT", default=10), 1),
+    })
+pool_wait_stats.warn_after_ms = env_int("DB_POOL_WAIT_WARN_MS", default=100)
+
+# Optional read replica for read-only queries; see db_routing.use_replica()
+replica_uri = normalize_database_uri(env_first("DATABASE_REPLICA_URL"))
+if replica_uri:
+    app.config["SQLALCHEMY_BINDS"] = {
+        REPLICA_BIND_KEY: {"url": replica_uri, **app.config["SQLALCHEMY_ENGINE_OPTIONS"]},
+    }
+    replica_monitor.max_lag_seconds = env_int("DB_REPLICA_MAX_LAG_SECONDS", default=5)
+    replica_monitor.check_interval = env_int("DB_REPLICA_CHECK_INTERVAL", default=10)
 app.config["SESSION_COOKIE_HTTPONLY"] = True
 app.config["REMEMBER_COOKIE_HTTPONLY"] = True
 app.config["SESSION_COOKIE_SAMESITE"] = "Lax"
 app.config["SESSION_COOKIE_SECURE"] = env_bool("SESSION_COOKIE_SECURE", default=is_production)
 app.config["REMEMBER_COOKIE_SECURE"] = env_bool("REMEMBER_COOKIE_SECURE", default=is_production)
 
-db = SQLAlchemy(app)
+db = SQLAlchemy(app, session_options={"class_": RoutingSession})
+
+# ----------------- PASSWORD HASHING -----------------
+app.config["BCRYPT_LOG_ROUNDS"] = min(max(env_int("BCRYPT_LOG_ROUNDS", default=12), 4), 31)
+app.config["BCRYPT_MAX_WORKERS"] = max(env_int("BCRYPT_MAX_WORKERS", default=os.cpu_count() or 1), 1)
 bcrypt = Bcrypt(app)
 
+# bcrypt is CPU-bound but releases the GIL, so a login burst would otherwise
+# run one hash per gunicorn thread at once. Capping concurrent hashes at the
+# core count keeps the other request threads responsive.
+password_executor = ThreadPoolExecutor(
+    max_workers=app.config["BCRYPT_MAX_WORKERS"],
+    thread_name_prefix="bcrypt",
+)
+
+
+def hash_password(password):
+    return password_executor.submit(bcrypt.generate_password_hash, password).result().decode("utf-8")
+
+
+def check_password(password_hash, password):
+    return password_executor.submit(bcrypt.check_password_hash, password_hash, password).result()
+
+
+def password_needs_rehash(password_hash):
+    # bcrypt hashes look like $2b$12$<salt+hash>; the second field is the cost
+    try:
+        cost = int(password_hash.split("$")[2])
+    except (IndexError, ValueError):
+        return True
+    return cost != app.config["BCRYPT_LOG_ROUNDS"]
+
 # Custom Jinja2 filter to format timestamp
 @app.template_filter('strftime')
 def _jinja2_filter_datetime(timestamp, fmt='%Y-%m-%d %H:%M:%S'):
@@ -160,15 +236,98 @@ def _jinja2_filter_datetime(timestamp, fmt='%Y-%m-%d %H:%M:%S'):
     return timestamp.strftime(fmt)
 
 
-# Add security headers to prevent caching
+# Add security headers to prevent caching of authenticated pages and API
+# responses; static assets get their own long-lived policy in serve_static()
 @app.after_request
 def add_security_headers(response):
+    if request.endpoint == "static" or response.mimetype not in ("text/html", "application/json"):
+        return response
+    if not (current_user.is_authenticated or g.get("api_user") is not None):
+        return response
     response.headers["Cache-Control"] = "no-store, no-cache, must-revalidate, max-age=0"
     response.headers["Pragma"] = "no-cache"
     response.headers["Expires"] = "0"
     return response
 
 
+# ----------------- STATIC ASSETS & COMPRESSION -----------------
+app.config["STATIC_MAX_AGE"] = env_int("STATIC_MAX_AGE", default=31536000)
+app.config["COMPRESS_MIN_BYTES"] = env_int("COMPRESS_MIN_BYTES", default=1024)
+COMPRESSIBLE_MIMETYPES = {"application/json", "text/html"}
+
+
+@app.url_defaults
+def fingerprint_static_urls(endpoint, values):
+    # url_for('static', ...) gains ?v=<content hash>, so a changed file gets a
+    # new URL and the old one can be cached forever
+    if endpoint == "static" and "filename" in values and "v" not in values:
+        fingerprint = content_hash(os.path.join(app.static_folder, values["filename"]))
+        if fingerprint:
+            values["v"] = fingerprint
+
+
+def serve_static(filename):
+    path = safe_join(app.static_folder, filename)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+
+    # Serve a precompressed .br/.gz variant when the client accepts one,
+    # skipping variants left over from before the source was last edited
+    available = [
+        encoding for encoding, suffix in PRECOMPRESSED_SUFFIXES.items()
+        if is_up_to_date(path, path + suffix)
+    ]
+    encoding = pick_encoding(request.headers.get("Accept-Encoding"), available)
+    if encoding:
+        response = send_from_directory(
+            app.static_folder,
+            filename + PRECOMPRESSED_SUFFIXES[encoding],
+            mimetype=mimetypes.guess_type(filename)[0] or "application/octet-stream",
+        )
+        response.headers["Content-Encoding"] = encoding
+    else:
+        response = send_from_directory(app.static_folder, filename)
+    response.vary.add("Accept-Encoding")
+
+    if request.args.get("v") == content_hash(path):
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = app.config["STATIC_MAX_AGE"]
+        response.cache_control.immutable = True
+    else:
+        # Unversioned or stale URL: let browsers cache but revalidate via ETag
+        response.cache_control.no_cache = True
+        response.cache_control.max_age = None
+    return response
+
+
+app.view_functions["static"] = serve_static
+
+
+@app.after_request
+def compress_response(response):
+    if (
+        response.direct_passthrough
+        or response.is_streamed
+        or response.status_code < 200
+        or response.status_code in (204, 304)
+        or "Content-Encoding" in response.headers
+        or response.mimetype not in COMPRESSIBLE_MIMETYPES
+    ):
+        return response
+
+    body = response.get_data()
+    if len(body) < app.config["COMPRESS_MIN_BYTES"]:
+        return response
+
+    response.vary.add("Accept-Encoding")
+    encoding = pick_encoding(request.headers.get("Accept-Encoding"), runtime_encodings())
+    if encoding:
+        response.set_data(compress(body, encoding))
+        response.headers["Content-Encoding"] = encoding
+    return response
+
+
 login_manager = LoginManager(app)
 login_manager.login_view = "form2"
 
@@ -392,9 +551,151 @@ class AnalysisHistory(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
 
+class APIKeyUsage(db.Model):
+    __tablename__ = 'api_key_usage'
+    # One row per key and bucket; every worker's flushes add to it
+    __table_args__ = (db.UniqueConstraint('api_key_id', 'bucket_start', name='uq_api_key_usage_bucket'),)
+    id = db.Column(db.Integer, primary_key=True)
+    api_key_id = db.Column(db.Integer, db.ForeignKey('api_keys.id', ondelete='CASCADE'), nullable=False, index=True)
+    bucket_start = db.Column(db.DateTime, nullable=False, index=True)
+    request_count = db.Column(db.Integer, nullable=False, default=0)
+    bytes_uploaded = db.Column(db.BigInteger, nullable=False, default=0)
+    rows_processed = db.Column(db.BigInteger, nullable=False, default=0)
+    training_seconds = db.Column(db.Float, nullable=False, default=0.0)
+    error_count = db.Column(db.Integer, nullable=False, default=0)
+    # Counts per usage_tracker.LATENCY_BOUNDS_MS bucket
+    latency_histogram = db.Column(db.JSON, nullable=False)
+
+
+# ----------------- API KEY USAGE -----------------
+usage_tracker = UsageTracker(
+    bucket_seconds=max(env_int("USAGE_BUCKET_SECONDS", default=3600), 60),
+    flush_interval=max(env_int("USAGE_FLUSH_INTERVAL", default=60), 1),
+    max_failed_flushes=max(env_int("USAGE_MAX_FAILED_FLUSHES", default=5), 1),
+)
+
+# api_key_usage is only in init.sql, which runs on fresh volumes alone, so
+# existing databases get the table on the first flush instead.
+usage_table_checked = False
+
+
+def ensure_usage_table():
+    global usage_table_checked
+    if not usage_table_checked:
+        APIKeyUsage.__table__.create(bind=db.engine, checkfirst=True)
+        usage_table_checked = True
+
+
+def usage_row_counters(row):
+    return {
+        "request_count": row.request_count,
+        "bytes_uploaded": row.bytes_uploaded,
+        "rows_processed": row.rows_processed,
+        "training_seconds": row.training_seconds,
+        "error_count": row.error_count,
+        "latency_histogram": row.latency_histogram,
+    }
+
+
+def write_usage(pending, last_used):
+    """
+    Adds the counters accumulated since the last flush to the APIKeyUsage
+    row of each (key, bucket), creating it if needed, and bumps
+    last_used_at, all in a single transaction. The rows are locked while
+    they are updated, so concurrent workers' flushes don't lose counts; two
+    workers inserting the same new bucket hit the unique constraint, and
+    the loser's counts are re-queued and added on its next flush.
+    """
+    with app.app_context():
+        ensure_usage_table()
+        key_ids = {api_key_id for api_key_id, _ in pending}
+        # Keys deleted since the requests were recorded have nothing to attach to
+        existing = {
+            key.id: key for key in APIKey.query.filter(APIKey.id.in_(key_ids)).all()
+        }
+        stored = {}
+        if existing:
+            rows = APIKeyUsage.query.filter(
+                APIKeyUsage.api_key_id.in_(list(existing)),
+                APIKeyUsage.bucket_start.in_(list({bucket for _, bucket in pending})),
+            ).with_for_update().all()
+            stored = {(row.api_key_id, row.bucket_start): row for row in rows}
+        for (api_key_id, bucket), counters in pending.items():
+            if api_key_id not in existing:
+                continue
+            row = stored.get((api_key_id, bucket))
+            if row is None:
+                db.session.add(APIKeyUsage(api_key_id=api_key_id, bucket_start=bucket, **counters))
+                continue
+            # Merged into fresh counters so the JSON histogram is reassigned, not mutated
+            totals = merge_counters(merge_counters(empty_counters(), usage_row_counters(row)), counters)
+            for field, value in totals.items():
+                setattr(row, field, value)
+        for api_key_id, used_at in last_used.items():
+            key = existing.get(api_key_id)
+            if key is not None and (key.last_used_at is None or key.last_used_at < used_at):
+                key.last_used_at = used_at
+        try:
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+
+usage_tracker.writer = write_usage
+atexit.register(usage_tracker.stop)
+
+
+def key_usage_summaries(keys, hours):
+    """
+    Sums stored and not-yet-flushed usage per key over the last `hours`.
+    The scalar counters are summed by the database; only the latency
+    histograms, which are JSON, are added up here.
+    """
+    key_ids = [key.id for key in keys]
+    totals = {key_id: empty_counters() for key_id in key_ids}
+    if key_ids:
+        window = (APIKeyUsage.api_key_id.in_(key_ids), APIKeyUsage.bucket_start >= datetime.utcnow() - timedelta(hours=hours))
+        try:
+            with use_replica():
+                sums = db.session.query(
+                    APIKeyUsage.api_key_id,
+                    db.func.sum(APIKeyUsage.request_count).label("request_count"),
+                    db.func.sum(APIKeyUsage.bytes_uploaded).label("bytes_uploaded"),
+                    db.func.sum(APIKeyUsage.rows_processed).label("rows_processed"),
+                    db.func.sum(APIKeyUsage.training_seconds).label("training_seconds"),
+                    db.func.sum(APIKeyUsage.error_count).label("error_count"),
+                ).filter(*window).group_by(APIKeyUsage.api_key_id).all()
+                histograms = db.session.query(APIKeyUsage.api_key_id, APIKeyUsage.latency_histogram).filter(*window).all()
+        except SQLAlchemyError:
+            # Most likely the table doesn't exist until the first flush creates it
+            db.session.rollback()
+            app.logger.warning("Could not read stored API key usage; showing unflushed usage only", exc_info=True)
+            sums, histograms = [], []
+        for row in sums:
+            merge_counters(totals[row.api_key_id], {
+                "request_count": int(row.request_count or 0),
+                "bytes_uploaded": int(row.bytes_uploaded or 0),
+                "rows_processed": int(row.rows_processed or 0),
+                "training_seconds": float(row.training_seconds or 0),
+                "error_count": int(row.error_count or 0),
+                "latency_histogram": None,
+            })
+        for api_key_id, histogram in histograms:
+            merge_counters(totals[api_key_id], {**empty_counters(), "latency_histogram": histogram})
+        for key_id, counters in usage_tracker.pending_for(key_ids).items():
+            merge_counters(totals[key_id], counters)
+    return {key_id: summarize(counters) for key_id, counters in totals.items()}
+
+
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    with use_replica():
+        user = User.query.get(int(user_id))
+    # A user who just registered may not have reached the replica yet
+    if user is None and replica_uri:
+        user = User.query.get(int(user_id))
+    return user
 
 # ----------------- SINGLE FORM ROUTE -----------------
 @app.route("/", methods=["GET", "POST"])
@@ -426,7 +727,7 @@ def form2():
                 flash("Account already exists. Please login or reset password.", "warning")
                 return redirect(url_for("form2"))
 
-            hashed = bcrypt.generate_password_hash(password).decode("utf-8")
+            hashed = hash_password(password)
             new_user = User(full_name=name, email=email, password_hash=hashed)
             db.session.add(new_user)
             db.session.commit()
@@ -444,7 +745,16 @@ def form2():
 
             user = User.query.filter_by(email=email).first()
 
-            if user and bcrypt.check_password_hash(user.password_hash, password):
+            if user and check_password(user.password_hash, password):
+                # Upgrade the stored hash if the configured cost has changed
+                if password_needs_rehash(user.password_hash):
+                    try:
+                        user.password_hash = hash_password(password)
+                        db.session.commit()
+                    except Exception:
+                        db.session.rollback()
+                        app.logger.exception("Failed to rehash password for %s", email)
+
                 login_user(user)
                 flash(f"Welcome, {user.full_name}!", "success")
                 return redirect(url_for("dashboard"))
@@ -505,7 +815,7 @@ def form2():
 @app.route("/dashboard")
 @login_required
 def dashboard():
-    return render_template("dashboard.html", current_user=current_user)
+    return render_template("dashboard.html", current_user=current_user, samples=sample_catalogue.listing())
 
 
 @app.route("/api-keys", methods=["GET", "POST"])
@@ -523,7 +833,29 @@ def api_keys():
         return redirect(url_for("api_keys"))
 
     keys = APIKey.query.filter_by(user_id=current_user.id).order_by(APIKey.created_at.desc()).all()
-    return render_template("api_keys.html", current_user=current_user, keys=keys)
+    usage = key_usage_summaries(keys, hours=24)
+    return render_template("api_keys.html", current_user=current_user, keys=keys, usage=usage)
+
+
+@app.route("/api-keys/usage")
+@login_required
+def api_keys_usage():
+    hours = min(max(request.args.get('hours', default=24, type=int), 1), 24 * 90)
+    keys = APIKey.query.filter_by(user_id=current_user.id).order_by(APIKey.created_at.desc()).all()
+    usage = key_usage_summaries(keys, hours=hours)
+    return jsonify({
+        'hours': hours,
+        'keys': [
+            {
+                'id': key.id,
+                'key_prefix': key.key[:8],
+                'created_at': key.created_at.isoformat() if key.created_at else None,
+                'last_used_at': key.last_used_at.isoformat() if key.last_used_at else None,
+                **usage[key.id],
+            }
+            for key in keys
+        ],
+    })
 
 
 @app.route("/api-keys/<int:key_id>/delete", methods=["POST"])
@@ -540,6 +872,147 @@ def delete_api_key(key_id):
     return redirect(url_for("api_keys"))
 
 
+# ----------------- UPLOAD LIMITS -----------------
+app.config["MAX_CONTENT_LENGTH"] = max(env_int("MAX_UPLOAD_MB", default=100), 1) * 1024 * 1024
+app.config["UPLOAD_SPOOL_MAX_MEMORY"] = max(env_int("UPLOAD_SPOOL_MAX_KB", default=512), 1) * 1024
+# Share of the container's free memory analyses may use; reservations for
+# jobs already running in this process are taken out of it
+app.config["MEMORY_BUDGET_FRACTION"] = min(max(float(env_first("MEMORY_BUDGET_FRACTION", default="0.5")), 0.05), 1.0)
+app.config["MEMORY_BUDGET_MB"] = env_int("MEMORY_BUDGET_MB", default=0)
+
+
+class SpoolingRequest(Request):
+    # Keep uploads in memory only up to UPLOAD_SPOOL_MAX_MEMORY, then move
+    # them to a temporary file so large bodies never sit in the worker's heap.
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return tempfile.SpooledTemporaryFile(max_size=app.config["UPLOAD_SPOOL_MAX_MEMORY"], mode="rb+")
+
+
+app.request_class = SpoolingRequest
+
+
+@app.errorhandler(RequestEntityTooLarge)
+def upload_too_large(e):
+    limit_mb = app.config["MAX_CONTENT_LENGTH"] // (1024 * 1024)
+    return jsonify({"error": f"Upload is too large. The limit is {limit_mb} MB."}), 413
+
+
+def memory_budget_bytes():
+    if app.config["MEMORY_BUDGET_MB"] > 0:
+        return app.config["MEMORY_BUDGET_MB"] * 1024 * 1024
+    available = available_memory()
+    if available is None:
+        return None
+    return int(available * app.config["MEMORY_BUDGET_FRACTION"])
+
+
+# Estimated peak memory of the jobs this process is running, so concurrent
+# requests and batch items don't each plan against the same free memory
+memory_reservation_lock = threading.Lock()
+memory_reserved_bytes = 0
+
+
+@contextmanager
+def read_upload_within_budget(file, filename=None, selection=None):
+    """
+    Sniffs the upload, checks its estimated footprint against what is left
+    of the memory budget and parses only as many rows as fit. Yields
+    (df, plan); the estimate stays reserved until the block exits, so run
+    the whole job inside it. Raises MemoryBudgetExceeded if not even a
+    downsampled run would fit.
+    """
+    global memory_reserved_bytes
+    # Plan and reserve under one lock so each job sees the others' reservations
+    with memory_reservation_lock:
+        budget = memory_budget_bytes()
+        if budget is not None:
+            budget = max(budget - memory_reserved_bytes, 0)
+        plan = plan_dataset_read(file, filename, budget_bytes=budget, selection=selection)
+        reserved = plan["estimated_bytes"] if budget is None else min(plan["estimated_bytes"], budget)
+        memory_reserved_bytes += reserved
+    try:
+        if plan["decision"] == "downsample":
+            app.logger.warning(
+                "Downsampling %s to %d rows to fit the memory budget",
+                filename or getattr(file, "filename", ""), plan["rows"],
+            )
+        yield read_dataset(file, filename, nrows=plan["rows"], selection=selection), plan
+    finally:
+        with memory_reservation_lock:
+            memory_reserved_bytes -= reserved
+
+
+# ----------------- COLUMN SELECTION -----------------
+def requested_list(name):
+    # Accepts repeated fields and/or comma-separated values
+    return [item.strip() for value in request.values.getlist(name) for item in value.split(',') if item.strip()]
+
+
+def requested_column_selection():
+    """
+    Returns the 'target', 'include' and 'exclude' request parameters as a
+    selection for read_dataset(), or None when none were given.
+    """
+    selection = {
+        "target": request.values.get('target', '').strip() or None,
+        "include": requested_list('include') or None,
+        "exclude": requested_list('exclude') or None,
+    }
+    return selection if any(selection.values()) else None
+
+
+# ----------------- HYPERPARAMETER SEARCH -----------------
+app.config["SEARCH_DEFAULT_BUDGET"] = max(env_int("SEARCH_DEFAULT_BUDGET", default=20), 1)
+app.config["SEARCH_MAX_BUDGET"] = max(env_int("SEARCH_MAX_BUDGET", default=60), 1)
+
+
+def requested_search_budget():
+    """
+    Returns the search time budget in seconds if the request asked for a
+    hyperparameter search ('search=true', optional 'time_budget'), else None.
+    """
+    values = request.values
+    if values.get('search', '').strip().lower() not in {"1", "true", "yes", "on"}:
+        return None
+    budget = values.get('time_budget', default=app.config["SEARCH_DEFAULT_BUDGET"], type=float)
+    # Stay well inside the gunicorn worker timeout
+    return min(max(budget or 0, 1), app.config["SEARCH_MAX_BUDGET"])
+
+
+# ----------------- INCREMENTAL RETRAINING -----------------
+# How many of a user's latest analyses of the same filename to scan for a
+# reusable model state
+app.config["INCREMENTAL_HISTORY_DEPTH"] = max(env_int("INCREMENTAL_HISTORY_DEPTH", default=5), 1)
+
+
+def requested_incremental():
+    return request.values.get('incremental', '').strip().lower() in {"1", "true", "yes", "on"}
+
+
+def previous_model_state(user_id, filename):
+    """
+    Returns the model_state saved by the user's latest analysis of a file
+    with this name, or None. A slightly stale replica only means an older
+    starting point for the warm start, so the lookup can use it.
+    """
+    with use_replica():
+        entries = AnalysisHistory.query.filter_by(user_id=user_id, filename=filename) \
+            .order_by(AnalysisHistory.created_at.desc()) \
+            .limit(app.config["INCREMENTAL_HISTORY_DEPTH"]).all()
+    for entry in entries:
+        state = (entry.result or {}).get('model_state')
+        if state:
+            return state
+    return None
+
+
+@app.template_filter('public_results')
+def public_results(results):
+    # Coefficients and normalization moments are kept in history for the
+    # next incremental run, not shown to the client or on the history page
+    return {key: value for key, value in (results or {}).items() if key != 'model_state'}
+
+
 # ----------------- API ROUTES -----------------
 from functools import wraps
 
@@ -551,18 +1024,44 @@ def require_api_key(f):
             return jsonify({'error': 'Authorization header is missing or invalid'}), 401
         
         api_key_str = auth_header.split(' ')[1]
-        api_key = APIKey.query.filter_by(key=api_key_str).first()
+        with use_replica():
+            api_key = APIKey.query.filter_by(key=api_key_str).first()
+        # A freshly generated key may not have reached the replica yet
+        if not api_key and replica_uri:
+            api_key = APIKey.query.filter_by(key=api_key_str).first()
         
         if not api_key:
             return jsonify({'error': 'Invalid API key'}), 401
         
-        # Update the last used timestamp
-        api_key.last_used_at = datetime.utcnow()
-        db.session.commit()
-        
         # Pass the user associated with the key to the route
         g.api_user = api_key.user
-        return f(*args, **kwargs)
+        g.api_key_id = api_key.id
+
+        # Usage and the last used timestamp are aggregated in memory and
+        # flushed periodically rather than written on every request
+        started = time.perf_counter()
+        bytes_uploaded = request.content_length or 0
+
+        def record(error):
+            usage_tracker.record_request(
+                api_key.id,
+                latency_ms=(time.perf_counter() - started) * 1000,
+                bytes_uploaded=bytes_uploaded,
+                error=error,
+            )
+
+        try:
+            response = app.make_response(f(*args, **kwargs))
+        except Exception:
+            record(error=True)
+            raise
+        if response.is_streamed:
+            # Streamed responses (batch analysis) do their work after the view
+            # returns, so time them until the body has been sent
+            response.call_on_close(partial(record, error=response.status_code >= 400))
+        else:
+            record(error=response.status_code >= 400)
+        return response
     return decorated_function
 
 @app.route("/api/analyze", methods=["POST"])
@@ -575,18 +1074,25 @@ def api_analyze():
     if file.filename == '':
         return jsonify({'error': 'No selected file'}), 400
 
-    if file and file.filename.endswith('.csv'):
+    if file and is_supported_dataset(file.filename):
         try:
-                df = pd.read_csv(file)
-
-                # Pass the DataFrame to the runner
-                runner = LogisticsRunner(data=df)
-                results = runner.run_experiment()
-
-                # Clean up results for JSON serialization
-                if 'training_history' in results:
-                    for key, value in results['training_history'].items():
-                        results['training_history'][key] = [float(v) for v in value]
+                with read_upload_within_budget(file, selection=requested_column_selection()) as (df, memory_plan):
+                    previous_state = None
+                    incremental = requested_incremental()
+                    if incremental:
+                        previous_state = previous_model_state(g.api_user.id, file.filename)
+
+                    # Pass the DataFrame to the runner; incremental runs fingerprint
+                    # the rows so the next re-upload can reuse this run's statistics
+                    runner = LogisticsRunner(data=df, previous_state=previous_state, track_rows=incremental)
+                    results = runner.run_experiment(search_budget=requested_search_budget())
+                    results['memory_plan'] = memory_plan
+                    usage_tracker.record_work(g.api_key_id, rows=len(df), training_seconds=results['training_seconds'])
+
+                    # Clean up results for JSON serialization
+                    if 'training_history' in results:
+                        for key, value in results['training_history'].items():
+                            results['training_history'][key] = [float(v) for v in value]
                 
                 # Save the analysis to history
                 history_entry = AnalysisHistory(
@@ -599,18 +1105,267 @@ def api_analyze():
                 
                 return jsonify({
                     'message': 'Analysis successful',
-                    **results
+                    **public_results(results)
                 }), 200
+        except MemoryBudgetExceeded as e:
+                return jsonify({'error': 'Dataset is too large to analyze', 'details': str(e)}), 413
+        except ColumnSelectionError as e:
+                return jsonify({'error': 'Invalid column selection', 'details': str(e)}), 400
         except Exception as e:
                 app.logger.error(f"API Analysis Error: {e}")
                 return jsonify({'error': 'An error occurred during analysis', 'details': str(e)}), 500
 
-    return jsonify({'error': 'Invalid file type. Please upload a .csv file'}), 400
+    return jsonify({'error': f'Invalid file type. Please upload one of: {supported_extensions_text()}'}), 400
+
+
+# ----------------- BATCH ANALYSIS -----------------
+app.config["BATCH_MAX_WORKERS"] = max(env_int("BATCH_MAX_WORKERS", default=os.cpu_count() or 1), 1)
+app.config["BATCH_MAX_DATASETS"] = max(env_int("BATCH_MAX_DATASETS", default=50), 1)
+
+# Shared by every batch request, so the number of concurrent trainings per
+# worker process stays bounded no matter how many batches are in flight.
+batch_executor = ThreadPoolExecutor(
+    max_workers=app.config["BATCH_MAX_WORKERS"],
+    thread_name_prefix="batch-analyze",
+)
+
+
+def detach_upload(file):
+    # Flask closes request.files once the view returns, but batch results keep
+    # streaming after that, so copy each upload into a spooled file we own.
+    spooled = tempfile.SpooledTemporaryFile(max_size=app.config["UPLOAD_SPOOL_MAX_MEMORY"])
+    shutil.copyfileobj(file.stream, spooled)
+    spooled.seek(0)
+    return spooled
+
+
+def spool_zip_member(zip_file, member):
+    """
+    Streams one archive member into a spooled file, after refusing members
+    whose declared size is over the upload limit or the memory budget, so a
+    small zip can't expand into the worker's heap.
+    """
+    limit = app.config["MAX_CONTENT_LENGTH"]
+    budget = memory_budget_bytes()
+    if budget is not None:
+        limit = min(limit, budget)
+    if member.file_size > limit:
+        raise MemoryBudgetExceeded(
+            f"This archive member is {member.file_size // (1024 * 1024)} MB uncompressed, "
+            f"over the {limit // (1024 * 1024)} MB limit."
+        )
+    spooled = tempfile.SpooledTemporaryFile(max_size=app.config["UPLOAD_SPOOL_MAX_MEMORY"])
+    with zip_file.open(member) as member_stream:
+        shutil.copyfileobj(member_stream, spooled)
+    spooled.seek(0)
+    return spooled
+
+
+def analyze_batch_item(source, filename, selection=None):
+    # source is either a detached upload or a callable that spools an
+    # archive member; archive members are only read in the worker.
+    if callable(source):
+        source = source()
+    try:
+        with read_upload_within_budget(source, filename, selection) as (df, memory_plan):
+            runner = LogisticsRunner(data=df)
+            results = runner.run_experiment()
+    finally:
+        source.close()
+    results['memory_plan'] = memory_plan
+    results['rows_processed'] = len(df)
+    return results
+
+
+def collect_batch_sources():
+    """
+    Returns a list of (filename, source) pairs from the request: either several
+    'datasets' file fields or a single 'archive' zip of datasets.
+    """
+    sources = []
+    archive = request.files.get('archive')
+    if archive and archive.filename:
+        if not archive.filename.lower().endswith('.zip'):
+            raise ValueError('Archive must be a .zip file')
+        try:
+            zip_file = zipfile.ZipFile(detach_upload(archive))
+        except zipfile.BadZipFile as e:
+            raise ValueError(f'Invalid zip archive: {e}') from e
+        for member in zip_file.infolist():
+            if member.is_dir():
+                continue
+            sources.append((member.filename, partial(spool_zip_member, zip_file, member)))
+
+    for file in request.files.getlist('datasets'):
+        if file.filename:
+            sources.append((file.filename, detach_upload(file) if is_supported_dataset(file.filename) else None))
+
+    return sources
+
+
+@app.route("/api/analyze/batch", methods=["POST"])
+@require_api_key
+def api_analyze_batch():
+    try:
+        sources = collect_batch_sources()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    if not sources:
+        return jsonify({'error': "No datasets provided. Send 'datasets' files or an 'archive' zip."}), 400
+    if len(sources) > app.config["BATCH_MAX_DATASETS"]:
+        return jsonify({'error': f"Too many datasets. The limit is {app.config['BATCH_MAX_DATASETS']} per request."}), 400
+
+    user_id = g.api_user.id
+    api_key_id = g.api_key_id
+    # Applied to every dataset in the batch
+    selection = requested_column_selection()
+
+    def generate():
+        history_entries = []
+        succeeded = 0
+
+        # Submit inside the streamed response so the uploaded files stay open
+        # until every worker has finished reading them.
+        futures = {}
+        rejected = []
+        for filename, source in sources:
+            if is_supported_dataset(filename):
+                futures[batch_executor.submit(analyze_batch_item, source, filename, selection)] = filename
+            else:
+                rejected.append(filename)
+
+        for filename in rejected:
+            yield app.json.dumps({
+                'filename': filename,
+                'status': 'error',
+                'error': f'Invalid file type. Please upload one of: {supported_extensions_text()}',
+            }) + "\n"
+
+        # Stream each dataset's result as soon as its training finishes
+        for future in as_completed(futures):
+            filename = futures[future]
+            try:
+                results = future.result()
+            except Exception as e:
+                usage_tracker.record_work(api_key_id, errors=1)
+                app.logger.error(f"Batch Analysis Error for {filename}: {e}")
+                yield app.json.dumps({'filename': filename, 'status': 'error', 'error': str(e)}) + "\n"
+                continue
+
+            succeeded += 1
+            usage_tracker.record_work(api_key_id, rows=results['rows_processed'], training_seconds=results['training_seconds'])
+            history_entries.append(AnalysisHistory(user_id=user_id, filename=filename, result=results))
+            yield app.json.dumps({'filename': filename, 'status': 'ok', **public_results(results)}) + "\n"
+
+        # Save every successful analysis in a single transaction
+        saved = False
+        if history_entries:
+            try:
+                db.session.add_all(history_entries)
+                db.session.commit()
+                saved = True
+            except Exception as e:
+                db.session.rollback()
+                app.logger.error(f"Batch Analysis history commit failed: {e}")
+
+        yield app.json.dumps({
+            'summary': {
+                'total': len(sources),
+                'succeeded': succeeded,
+                'failed': len(sources) - succeeded,
+                'history_saved': saved,
+            }
+        }) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+
+# ----------------- DATASET PROFILING -----------------
+def profile_upload(file):
+    """
+    Reads at most the rows LogisticsRunner would train on, within the memory
+    budget, and profiles them.
+    Optional query parameters: 'sample' (rows to sample) and 'bins', plus
+    the same 'target'/'include'/'exclude' column selection as analysis.
+    """
+    sample_rows = request.args.get('sample', type=int)
+    bins = min(max(request.args.get('bins', default=10, type=int), 1), 100)
+
+    started = time.perf_counter()
+    with read_upload_within_budget(file, selection=requested_column_selection()) as (df, memory_plan):
+        profile = profile_dataset(df, sample_rows=sample_rows if sample_rows and sample_rows > 0 else None, bins=bins)
+    profile['memory_plan'] = memory_plan
+    profile['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 2)
+    return profile
+
+
+@app.route("/api/profile", methods=["POST"])
+@require_api_key
+def api_profile():
+    file = request.files.get('dataset')
+    if not file or file.filename == '':
+        return jsonify({'error': 'No dataset file provided'}), 400
+    if not is_supported_dataset(file.filename):
+        return jsonify({'error': f'Invalid file type. Please upload one of: {supported_extensions_text()}'}), 400
+
+    try:
+        return jsonify(profile_upload(file)), 200
+    except MemoryBudgetExceeded as e:
+        return jsonify({'error': 'Dataset is too large to profile', 'details': str(e)}), 413
+    except ColumnSelectionError as e:
+        return jsonify({'error': 'Invalid column selection', 'details': str(e)}), 400
+    except Exception as e:
+        app.logger.error(f"API Profile Error: {e}")
+        return jsonify({'error': 'Could not read the dataset', 'details': str(e)}), 400
+
+
+# ----------------- SAMPLE DATASETS -----------------
+# Built by `python sample_datasets.py` at image build time (or on first use):
+# memory-mapped Arrow files shared by all workers via the page cache, plus
+# precomputed default analysis results.
+app.config["SAMPLE_DATA_DIR"] = env_first("SAMPLE_DATA_DIR", default=DEFAULT_SAMPLE_DIR)
+sample_catalogue = SampleCatalogue(app.config["SAMPLE_DATA_DIR"])
+
+
+@app.route("/api/samples")
+@require_api_key
+def api_samples():
+    return jsonify({'samples': sample_catalogue.listing()})
+
+
+@app.route("/api/samples/<name>")
+@require_api_key
+def api_sample_results(name):
+    if name not in sample_catalogue:
+        return jsonify({'error': f"Unknown sample dataset '{name}'"}), 404
+    try:
+        return jsonify({'message': 'Analysis successful', **sample_catalogue.results(name)}), 200
+    except Exception as e:
+        app.logger.error(f"Sample Dataset Error for {name}: {e}")
+        return jsonify({'error': 'Sample dataset is unavailable', 'details': str(e)}), 500
+
+
+@app.route("/samples/<name>/analyze")
+@login_required
+def analyze_sample(name):
+    # Same response shape as /analyze, so the dashboard renders it unchanged
+    if name not in sample_catalogue:
+        return jsonify({"error": f"Unknown sample dataset '{name}'"}), 404
+    try:
+        return jsonify({**sample_catalogue.results(name), "data_preview": sample_catalogue.preview(name)})
+    except Exception as e:
+        app.logger.error(f"Sample analysis failed for {name}: {e}")
+        return jsonify({"error": str(e)}), 500
 
 
 from openai import OpenAI
 
 # ----------------- CHATBOT ROUTES -----------------
+# Overridable so load tests can point the chatbot at a local stand-in
+app.config["XAI_API_HOST"] = env_first("XAI_API_HOST", default="api.x.ai")
+app.config["XAI_API_BASE"] = env_first("XAI_API_BASE", default="https://api.x.ai/v1")
+app.config["XAI_USE_INSECURE_CHANNEL"] = env_bool("XAI_USE_INSECURE_CHANNEL", default=False)
 
 # Initialize a client for model listing, using the OpenAI library
 grok_model_client = None
@@ -618,7 +1373,7 @@ xai_api_key_for_models = env_first("XAI_API_KEY")
 if xai_api_key_for_models:
     grok_model_client = OpenAI(
         api_key=xai_api_key_for_models,
-        base_url="https://api.x.ai/v1",
+        base_url=app.config["XAI_API_BASE"],
         timeout=180,
     )
 
@@ -662,7 +1417,12 @@ def ask():
         if not xai_api_key:
             return jsonify({"error": "XAI_API_KEY is not configured on the server."}), 500
 
-        client = Client(api_key=xai_api_key, timeout=180)
+        client = Client(
+            api_key=xai_api_key,
+            api_host=app.config["XAI_API_HOST"],
+            use_insecure_channel=app.config["XAI_USE_INSECURE_CHANNEL"],
+            timeout=180,
+        )
 
         model_name = "grok-1.5-flash"
         app.logger.info(f"Attempting to use Grok model: {model_name}")
@@ -692,7 +1452,8 @@ def ask():
 @app.route("/analysis-history")
 @login_required
 def analysis_history():
-    history = AnalysisHistory.query.filter_by(user_id=current_user.id).order_by(AnalysisHistory.created_at.desc()).all()
+    with use_replica():
+        history = AnalysisHistory.query.filter_by(user_id=current_user.id).order_by(AnalysisHistory.created_at.desc()).all()
     return render_template("analysis_history.html", history=history)
 
 
@@ -708,6 +1469,44 @@ def api_test_page():
     return render_template("api_test_page.html")
 
 
+# Operational endpoints are limited to the emails in OPS_ADMIN_EMAILS (when
+# logged in) or to requests sending OPS_TOKEN in an X-Ops-Token header.
+app.config["OPS_ADMIN_EMAILS"] = {
+    email.strip().lower() for email in (env_first("OPS_ADMIN_EMAILS") or "").split(",") if email.strip()
+}
+app.config["OPS_TOKEN"] = env_first("OPS_TOKEN")
+
+
+def require_ops_access(f):
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        token = app.config["OPS_TOKEN"]
+        sent_token = request.headers.get('X-Ops-Token', '')
+        if token and sent_token and secrets.compare_digest(sent_token, token):
+            return f(*args, **kwargs)
+        if current_user.is_authenticated and current_user.email.lower() in app.config["OPS_ADMIN_EMAILS"]:
+            return f(*args, **kwargs)
+        # Don't reveal that the endpoint exists
+        abort(404)
+    return decorated_function
+
+
+@app.route("/db-pool-stats")
+@require_ops_access
+def db_pool_stats():
+    stats = {
+        "checkout_wait": pool_wait_stats.snapshot(),
+        "primary": {"pool": db.engine.pool.status()},
+    }
+    if replica_uri:
+        stats["replica"] = {
+            "pool": db.engines[REPLICA_BIND_KEY].pool.status(),
+            "usable": replica_monitor.is_usable(db.engines[REPLICA_BIND_KEY]),
+            "lag_seconds": replica_monitor.last_lag_seconds,
+        }
+    return jsonify(stats)
+
+
 # ----------------- LOGOUT -----------------
 @app.route("/logout")
 @login_required
@@ -742,7 +1541,7 @@ def reset(token):
             flash("Passwords do not match.", "danger")
             return redirect(request.url)
 
-        hashed = bcrypt.generate_password_hash(password).decode("utf-8")
+        hashed = hash_password(password)
 
         user.password_hash = hashed
         user.reset_token = None
@@ -765,31 +1564,54 @@ def analyze():
     if file.filename == '':
         return jsonify({"error": "No selected file"}), 400
 
-    if file and file.filename.endswith('.csv'):
+    if file and is_supported_dataset(file.filename):
         try:
-                df = pd.read_csv(file)
-                
-                # Prepare a preview of the dataframe for the frontend
-                # Convert to a dictionary for JSON serialization
-                data_preview = df.head(100).to_dict(orient='records')
-
-                # Initialize and run the logistics pipeline
-                runner = LogisticsRunner(data=df)
-                results = runner.run_experiment()
-                results['data_preview'] = data_preview
-
-                # Clean up results for JSON serialization
-                if 'training_history' in results:
-                    for key, value in results['training_history'].items():
-                        results['training_history'][key] = [float(v) for v in value]
+                with read_upload_within_budget(file, selection=requested_column_selection()) as (df, memory_plan):
+                    # Prepare a preview of the dataframe for the frontend
+                    # Convert to a dictionary for JSON serialization
+                    data_preview = df.head(100).to_dict(orient='records')
+
+                    # Initialize and run the logistics pipeline
+                    runner = LogisticsRunner(data=df)
+                    results = runner.run_experiment(search_budget=requested_search_budget())
+                    results['data_preview'] = data_preview
+                    results['memory_plan'] = memory_plan
+                    results = public_results(results)
+
+                    # Clean up results for JSON serialization
+                    if 'training_history' in results:
+                        for key, value in results['training_history'].items():
+                            results['training_history'][key] = [float(v) for v in value]
 
                 return jsonify(results)
 
+        except MemoryBudgetExceeded as e:
+                return jsonify({"error": str(e)}), 413
+        except ColumnSelectionError as e:
+                return jsonify({"error": str(e)}), 400
         except Exception as e:
                 app.logger.error(f"Analysis failed: {e}")
                 return jsonify({"error": str(e)}), 500
 
-    return jsonify({"error": "Invalid file type. Please upload a CSV."}), 400
+    return jsonify({"error": f"Invalid file type. Please upload one of: {supported_extensions_text()}"}), 400
+
+
+@app.route("/profile", methods=["POST"])
+@login_required
+def profile():
+    file = request.files.get('dataset')
+    if not file or file.filename == '':
+        return jsonify({"error": "No selected file"}), 400
+    if not is_supported_dataset(file.filename):
+        return jsonify({"error": f"Invalid file type. Please upload one of: {supported_extensions_text()}"}), 400
+
+    try:
+        return jsonify(profile_upload(file))
+    except MemoryBudgetExceeded as e:
+        return jsonify({"error": str(e)}), 413
+    except Exception as e:
+        app.logger.error(f"Profile failed: {e}")
+        return jsonify({"error": str(e)}), 400
 
 
 # ----------------- RUN -----------------
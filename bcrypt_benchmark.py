@@ -0,0 +1,49 @@
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+
+
+def logins_per_second(cost, workers, logins):
+    """
+    Checks `logins` passwords against a hash of the given cost on a pool of
+    `workers` threads, the same way the login handler does.
+    """
+    password = b"correct horse battery staple"
+    password_hash = bcrypt.hashpw(password, bcrypt.gensalt(rounds=cost))
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        started = time.perf_counter()
+        list(executor.map(lambda _: bcrypt.checkpw(password, password_hash), range(logins)))
+        elapsed = time.perf_counter() - started
+
+    return logins / elapsed, elapsed / logins * workers
+
+
+def main():
+    """
+    Prints login throughput at different bcrypt costs and worker counts, to
+    size BCRYPT_LOG_ROUNDS, BCRYPT_MAX_WORKERS and the gunicorn workers.
+    """
+    parser = argparse.ArgumentParser(description="Measure bcrypt login throughput per cost and worker count.")
+    parser.add_argument("--costs", default="10,11,12,13", help="Comma-separated bcrypt costs. Defaults to 10,11,12,13.")
+    parser.add_argument("--workers", default="1,2,4", help="Comma-separated worker counts. Defaults to 1,2,4.")
+    parser.add_argument("--logins", type=int, default=16, help="Password checks per measurement. Defaults to 16.")
+    args = parser.parse_args()
+
+    costs = [int(c) for c in args.costs.split(",")]
+    worker_counts = [int(w) for w in args.workers.split(",")]
+
+    print("-" * 60)
+    print(f"{'cost':>4} {'workers':>8} {'logins/s':>10} {'ms/login':>10}")
+    print("-" * 60)
+    for cost in costs:
+        for workers in worker_counts:
+            throughput, latency = logins_per_second(cost, workers, args.logins)
+            print(f"{cost:>4} {workers:>8} {throughput:>10.1f} {latency * 1000:>10.1f}")
+    print("-" * 60)
+
+
+if __name__ == "__main__":
+    main()
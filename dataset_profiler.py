@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+
+from logistics_runner import MAX_TARGET_UNIQUE_RATIO
+
+
+def column_histogram(values: np.ndarray, bins: int) -> dict:
+    # np.histogram can't bin ±inf; infinite cells are counted separately
+    values = values[np.isfinite(values)]
+    if values.size == 0:
+        return {"counts": [], "edges": []}
+    counts, edges = np.histogram(values, bins=bins)
+    return {"counts": counts.tolist(), "edges": [float(edge) for edge in edges]}
+
+
+def profile_dataset(data: pd.DataFrame, sample_rows: int = None, bins: int = 10, random_state: int = 100) -> dict:
+    """
+    Summarizes a dataset the way LogisticsRunner will see it (target is the
+    last column, numeric columns are features) and predicts whether training
+    would be rejected, without running any of the training pipeline.
+
+    When sample_rows is set and the dataset is larger, histograms and the
+    target checks are computed on a random sample and marked approximate.
+    """
+    total_rows = len(data)
+    sampled = sample_rows is not None and total_rows > sample_rows
+    if sampled:
+        data = data.sample(n=sample_rows, random_state=random_state)
+
+    problems = []
+    if data.shape[1] < 2:
+        return {
+            "rows": total_rows,
+            "sampled_rows": len(data) if sampled else None,
+            "approximate": sampled,
+            "columns": [],
+            "target": None,
+            "verdict": "reject",
+            "problems": ["The dataset needs at least one feature column and a target column."],
+        }
+
+    target_column = data.columns[-1]
+    feature_columns = [col for col in data.columns[:-1] if pd.api.types.is_numeric_dtype(data[col])]
+
+    # Null counts for every column in one pass
+    null_counts = data.isnull().sum()
+
+    columns = []
+    infinite_columns = []
+    for col in data.columns:
+        entry = {
+            "name": str(col),
+            "dtype": str(data[col].dtype),
+            "nulls": int(null_counts[col]),
+            "role": "target" if col == target_column else ("feature" if col in feature_columns else "ignored"),
+        }
+        if entry["role"] == "feature":
+            values = data[col].to_numpy(dtype=float, na_value=np.nan)
+            entry["infinite"] = int(np.isinf(values).sum())
+            if entry["infinite"]:
+                infinite_columns.append(str(col))
+            entry["histogram"] = column_histogram(values, bins)
+        columns.append(entry)
+
+    # Target cardinality and class balance
+    target_series = data[target_column]
+    target_nulls = int(null_counts[target_column])
+    class_counts = target_series.value_counts(dropna=True)
+    non_null = len(target_series) - target_nulls
+    unique_ratio = len(class_counts) / non_null if non_null else 0.0
+    target = {
+        "name": str(target_column),
+        "nulls": target_nulls,
+        "unique_values": int(len(class_counts)),
+        "unique_ratio": round(unique_ratio, 4),
+    }
+    if unique_ratio <= MAX_TARGET_UNIQUE_RATIO:
+        target["class_balance"] = {
+            str(label): round(count / non_null, 4) for label, count in class_counts.items()
+        }
+
+    # The same checks preprocess_data() and split_data() apply, in that order
+    if not feature_columns:
+        problems.append("No numeric feature columns were found.")
+    if infinite_columns:
+        # Mean imputation only fills NaN; the solver rejects infinite values
+        problems.append(f"Feature column(s) {', '.join(infinite_columns)} contain infinite values.")
+    if target_nulls:
+        problems.append(f"The target column '{target_column}' has {target_nulls} missing values.")
+    if unique_ratio > MAX_TARGET_UNIQUE_RATIO:
+        problems.append(f"The target column '{target_column}' has too many unique values and appears to be a regression problem.")
+    if len(class_counts) < 2:
+        problems.append(f"The target column '{target_column}' needs at least two classes.")
+
+    return {
+        "rows": total_rows,
+        "sampled_rows": len(data) if sampled else None,
+        "approximate": sampled,
+        "columns": columns,
+        "target": target,
+        "verdict": "reject" if problems else "ok",
+        "problems": problems,
+    }
@@ -0,0 +1,176 @@
+import pandas as pd
+
+# Upload suffixes the analyze routes accept, mapped to (format, compression).
+SUPPORTED_FORMATS = {
+    ".csv": ("csv", None),
+    ".csv.gz": ("csv", "gzip"),
+    ".csv.zst": ("csv", "zstd"),
+    ".parquet": ("parquet", None),
+    ".arrow": ("arrow", None),
+    ".feather": ("arrow", None),
+}
+
+
+def detect_format(filename: str):
+    """
+    Returns the (format, compression) pair for an upload filename,
+    or None if the file type is not supported.
+    """
+    name = (filename or "").lower()
+    # Check the longest suffixes first so ".csv.gz" wins over ".csv"
+    for suffix in sorted(SUPPORTED_FORMATS, key=len, reverse=True):
+        if name.endswith(suffix):
+            return SUPPORTED_FORMATS[suffix]
+    return None
+
+
+def is_supported_dataset(filename: str) -> bool:
+    return detect_format(filename) is not None
+
+
+def supported_extensions_text() -> str:
+    return ", ".join(SUPPORTED_FORMATS)
+
+
+# Rows parsed to find a CSV's header and which of its columns are numeric
+CSV_SNIFF_ROWS = 200
+
+
+class ColumnSelectionError(ValueError):
+    """Raised when a requested target or feature column can't be used."""
+
+
+def select_columns(names: list, numeric, selection: dict = None) -> list:
+    """
+    Picks the columns LogisticsRunner actually uses, in file order with the
+    target moved last: every numeric feature (or only the 'include'd ones,
+    minus any 'exclude'd ones) plus the target. The target is the
+    selection's 'target', or the last column when none is given.
+    """
+    if not names:
+        return []
+    selection = selection or {}
+    target = selection.get("target") or names[-1]
+    include = selection.get("include")
+    exclude = set(selection.get("exclude") or [])
+
+    unknown = [name for name in [target, *(include or []), *exclude] if name not in names]
+    if unknown:
+        raise ColumnSelectionError(f"Unknown column(s): {', '.join(dict.fromkeys(unknown))}.")
+    if include:
+        non_numeric = [name for name in include if name not in numeric and name != target]
+        if non_numeric:
+            raise ColumnSelectionError(f"Feature column(s) must be numeric: {', '.join(non_numeric)}.")
+
+    wanted = set(include) if include else set(numeric)
+    features = [name for name in names if name in wanted and name not in exclude and name != target]
+    if not features:
+        raise ColumnSelectionError(f"The selection leaves no numeric feature columns to predict '{target}' from.")
+    return features + [target]
+
+
+def needed_columns(schema, selection: dict = None) -> list:
+    """Applies select_columns() to an Arrow schema."""
+    import pyarrow as pa
+
+    numeric = {
+        field.name for field in schema
+        if pa.types.is_integer(field.type)
+        or pa.types.is_floating(field.type)
+        or pa.types.is_boolean(field.type)
+        or pa.types.is_decimal(field.type)
+    }
+    return select_columns(schema.names, numeric, selection)
+
+
+def read_parquet(stream, nrows: int = None, selection: dict = None) -> pd.DataFrame:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    parquet_file = pq.ParquetFile(stream)
+    columns = needed_columns(parquet_file.schema_arrow, selection)
+    if nrows is None:
+        # select() puts the target last even when it isn't last in the file
+        return parquet_file.read(columns=columns).select(columns).to_pandas()
+
+    # Stop decoding once enough rows have been read
+    batches = []
+    remaining = nrows
+    for batch in parquet_file.iter_batches(columns=columns):
+        batches.append(batch.slice(0, remaining))
+        remaining -= min(len(batch), remaining)
+        if remaining == 0:
+            break
+    schema = pa.schema([parquet_file.schema_arrow.field(name) for name in columns])
+    return pa.Table.from_batches(batches, schema=schema).to_pandas()
+
+
+def read_arrow(stream, nrows: int = None, selection: dict = None) -> pd.DataFrame:
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+
+    # Arrow IPC files (and Feather v2, which is the same format) carry their
+    # schema in the footer, so only the projected columns are decoded.
+    schema = ipc.open_file(stream).schema
+    columns = needed_columns(schema, selection)
+    stream.seek(0)
+    options = ipc.IpcReadOptions(included_fields=[schema.get_field_index(name) for name in columns])
+    reader = ipc.open_file(stream, options=options)
+    if nrows is None:
+        # select() puts the target last even when it isn't last in the file
+        return reader.read_all().select(columns).to_pandas()
+
+    # Stop decoding once enough rows have been read
+    batches = []
+    remaining = nrows
+    for i in range(reader.num_record_batches):
+        batch = reader.get_batch(i)
+        batches.append(batch.slice(0, remaining))
+        remaining -= min(len(batch), remaining)
+        if remaining == 0:
+            break
+    return pa.Table.from_batches(batches, schema=reader.schema).select(columns).to_pandas()
+
+
+def read_csv(stream, compression: str = None, nrows: int = None, selection: dict = None) -> pd.DataFrame:
+    # CSV has no schema, so infer the numeric columns from the first rows and
+    # let the parser skip everything else instead of converting it.
+    position = stream.tell()
+    sample = pd.read_csv(stream, compression=compression, nrows=CSV_SNIFF_ROWS)
+    stream.seek(position)
+
+    names = list(sample.columns)
+    numeric = {name for name in names if pd.api.types.is_numeric_dtype(sample[name])}
+    columns = select_columns(names, numeric, selection)
+
+    # Positions rather than names, so duplicate headers (which pandas renames) still match
+    positions = [names.index(name) for name in columns]
+    data = pd.read_csv(stream, compression=compression, nrows=nrows, usecols=positions)
+    # usecols keeps file order; put the target last
+    order = sorted(positions)
+    return data.iloc[:, [order.index(position) for position in positions]]
+
+
+def read_dataset(file, filename: str = None, nrows: int = None, selection: dict = None) -> pd.DataFrame:
+    """
+    Reads an uploaded dataset into a DataFrame.
+
+    file can be a werkzeug FileStorage or any seekable binary file object.
+    Compressed CSVs are decompressed as a stream. Only the columns
+    LogisticsRunner uses are read and converted, with the target last; the
+    optional selection ({"target", "include", "exclude"}) picks them
+    explicitly. nrows stops reading after that many rows.
+    """
+    filename = filename or getattr(file, "filename", "")
+    detected = detect_format(filename)
+    if detected is None:
+        raise ValueError(f"Unsupported file type. Please upload one of: {supported_extensions_text()}")
+
+    file_format, compression = detected
+    stream = getattr(file, "stream", file)
+
+    if file_format == "parquet":
+        return read_parquet(stream, nrows, selection)
+    if file_format == "arrow":
+        return read_arrow(stream, nrows, selection)
+    return read_csv(stream, compression, nrows, selection)
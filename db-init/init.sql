@@ -23,4 +23,20 @@ CREATE TABLE IF NOT EXISTS analysis_history (
     result JSON NOT NULL,
     created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS api_key_usage (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    api_key_id INT NOT NULL,
+    bucket_start DATETIME NOT NULL,
+    request_count INT NOT NULL DEFAULT 0,
+    bytes_uploaded BIGINT NOT NULL DEFAULT 0,
+    rows_processed BIGINT NOT NULL DEFAULT 0,
+    training_seconds DOUBLE NOT NULL DEFAULT 0,
+    error_count INT NOT NULL DEFAULT 0,
+    latency_histogram JSON NOT NULL,
+    UNIQUE KEY uq_api_key_usage_bucket (api_key_id, bucket_start),
+    INDEX idx_api_key_usage_key (api_key_id),
+    INDEX idx_api_key_usage_bucket (bucket_start),
+    FOREIGN KEY (api_key_id) REFERENCES api_keys(id) ON DELETE CASCADE
 );
\ No newline at end of file
@@ -0,0 +1,156 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from flask_sqlalchemy.session import Session
+from sqlalchemy import text
+from sqlalchemy.pool import QueuePool
+
+logger = logging.getLogger(__name__)
+
+REPLICA_BIND_KEY = "replica"
+
+# Set inside use_replica() blocks; read by RoutingSession.get_bind()
+_replica_reads = ContextVar("replica_reads", default=False)
+
+
+@contextmanager
+def use_replica():
+    """
+    Routes SELECTs issued inside the block to the read replica, if one is
+    configured and not lagging. Writes and flushes always go to the primary.
+    """
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+class PoolWaitStats:
+    """
+    Thread-safe running totals of how long connection checkouts took.
+    Shared by every engine that uses TimedQueuePool in this process.
+    """
+
+    def __init__(self, warn_after_ms: float = 100):
+        self.warn_after_ms = warn_after_ms
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+        self.slow_checkouts = 0
+
+    def record(self, wait_ms: float, pool_status: str):
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait_ms += wait_ms
+            self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+            if wait_ms >= self.warn_after_ms:
+                self.slow_checkouts += 1
+        if wait_ms >= self.warn_after_ms:
+            logger.warning("Slow DB connection checkout: %.1f ms (%s)", wait_ms, pool_status)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "avg_wait_ms": round(self.total_wait_ms / self.checkouts, 3) if self.checkouts else 0.0,
+                "max_wait_ms": round(self.max_wait_ms, 3),
+                "slow_checkouts": self.slow_checkouts,
+                "slow_threshold_ms": self.warn_after_ms,
+            }
+
+
+pool_wait_stats = PoolWaitStats()
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection."""
+
+    def connect(self):
+        started = time.perf_counter()
+        connection = super().connect()
+        pool_wait_stats.record((time.perf_counter() - started) * 1000, self.status())
+        return connection
+
+
+class ReplicaMonitor:
+    """
+    Caches whether the replica is healthy and within the allowed lag, so the
+    lag query runs at most once per check interval per process.
+    """
+
+    def __init__(self, max_lag_seconds: float = 5, check_interval: float = 10):
+        self.max_lag_seconds = max_lag_seconds
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._checked_at = 0.0
+        self._usable = False
+        self.last_lag_seconds = None
+
+    def measure_lag(self, engine):
+        dialect = engine.dialect.name
+        with engine.connect() as conn:
+            if dialect in ("mysql", "mariadb"):
+                row = conn.execute(text("SHOW REPLICA STATUS")).mappings().first()
+                if row is None:
+                    # Not configured as a replica, so nothing to lag behind
+                    return 0.0
+                lag = row.get("Seconds_Behind_Source", row.get("Seconds_Behind_Master"))
+                # NULL lag means replication is stopped
+                return float("inf") if lag is None else float(lag)
+            if dialect == "postgresql":
+                lag = conn.execute(text(
+                    "SELECT CASE WHEN pg_is_in_recovery() "
+                    "THEN COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) "
+                    "ELSE 0 END"
+                )).scalar()
+                return float(lag or 0)
+        return 0.0
+
+    def is_usable(self, engine) -> bool:
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return self._usable
+
+        with self._lock:
+            # Another thread may have refreshed while we waited for the lock
+            if now - self._checked_at < self.check_interval:
+                return self._usable
+            try:
+                self.last_lag_seconds = self.measure_lag(engine)
+                self._usable = self.last_lag_seconds <= self.max_lag_seconds
+                if not self._usable:
+                    logger.warning("Read replica lag %.1fs exceeds %.1fs; using primary", self.last_lag_seconds, self.max_lag_seconds)
+            except Exception as e:
+                logger.warning("Read replica health check failed; using primary: %s", e)
+                self.last_lag_seconds = None
+                self._usable = False
+            self._checked_at = time.monotonic()
+            return self._usable
+
+
+replica_monitor = ReplicaMonitor()
+
+
+class RoutingSession(Session):
+    """
+    Flask-SQLAlchemy session that sends SELECTs made inside use_replica()
+    to the replica bind. Everything else keeps the default bind-key routing.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (
+            bind is None
+            and _replica_reads.get()
+            and not self._flushing
+            and clause is not None
+            and getattr(clause, "is_select", False)
+        ):
+            replica = self._db.engines.get(REPLICA_BIND_KEY)
+            if replica is not None and replica_monitor.is_usable(replica):
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
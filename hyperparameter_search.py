@@ -0,0 +1,174 @@
+import math
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import numpy as np
+from sklearn.model_selection import StratifiedKFold
+
+from logistics_runner import fit_logistic_regression
+
+SEARCH_C_VALUES = [0.001, 0.01, 0.1, 1.0, 10.0, 100.0]
+SEARCH_PENALTIES = ["l2", "l1"]
+
+# Shared by every search in the process, so concurrent searches queue for
+# the cores instead of each starting cpu_count threads of its own. The
+# candidate configs leave BLAS at the process-wide single thread (see
+# logistics_runner); the parallelism comes from running candidates side by side.
+search_executor = ThreadPoolExecutor(
+    max_workers=os.cpu_count() or 1,
+    thread_name_prefix="hyperparameter-search",
+)
+
+
+def candidate_configs(n_classes: int) -> list:
+    """
+    Builds the search grid as solver configs for fit_logistic_regression().
+    l1 needs a solver that supports it: liblinear for binary targets, saga otherwise.
+    """
+    l1_solver = "liblinear" if n_classes == 2 else "saga"
+    candidates = []
+    for penalty in SEARCH_PENALTIES:
+        for c_value in SEARCH_C_VALUES:
+            candidates.append({
+                "name": "lbfgs" if penalty == "l2" else l1_solver,
+                "tol": 1e-4,
+                "max_iter": 1000,
+                "threads": None,
+                "C": c_value,
+                "penalty": penalty,
+            })
+    return candidates
+
+
+def cross_validate_candidate(config: dict, features, labels, folds: int, deadline: float, random_state: int) -> dict:
+    """
+    Scores one candidate with stratified k-fold CV, stopping early if the
+    deadline passes. Returns the per-fold accuracies and the time spent.
+    """
+    splitter = StratifiedKFold(n_splits=folds, shuffle=True, random_state=random_state)
+    scores = []
+    started = time.perf_counter()
+    for train_index, test_index in splitter.split(features, labels):
+        if time.perf_counter() >= deadline:
+            break
+        model, _ = fit_logistic_regression(features[train_index], labels[train_index], config, random_state=random_state)
+        scores.append(float((model.predict(features[test_index]) == labels[test_index]).mean()))
+    return {
+        "scores": scores,
+        "complete": len(scores) == folds,
+        "seconds": time.perf_counter() - started,
+    }
+
+
+def successive_halving_search(
+    features,
+    labels,
+    n_classes: int,
+    time_budget: float,
+    folds: int = 5,
+    eta: int = 3,
+    executor: ThreadPoolExecutor = None,
+    random_state: int = 100,
+) -> dict:
+    """
+    Searches regularization strength and penalty with k-fold CV and
+    successive halving: every candidate is scored on a small subsample, the
+    best 1/eta advance to a subsample eta times larger, and so on until the
+    survivors are scored on all rows. Candidates in a round run in parallel
+    on executor, which defaults to the shared search_executor.
+
+    Stops starting new work once time_budget seconds have passed and returns
+    the best fully cross-validated candidate found so far.
+    """
+    started = time.perf_counter()
+    deadline = started + time_budget
+    features = np.asarray(features, dtype=float)
+    labels = np.asarray(labels)
+    n_samples = len(labels)
+
+    candidates = candidate_configs(n_classes)
+    n_rounds = int(math.log(len(candidates), eta)) + 1
+    # Every fold needs a few rows of each class, even in the first round
+    min_samples = min(folds * n_classes * 10, n_samples)
+
+    history = [{"C": c["C"], "penalty": c["penalty"], "solver": c["name"], "rounds": []} for c in candidates]
+    survivors = list(range(len(candidates)))
+    best = None
+    budget_exhausted = False
+
+    executor = executor or search_executor
+    for round_index in range(n_rounds):
+        n_rows = n_samples if round_index == n_rounds - 1 else \
+            max(min_samples, n_samples // eta ** (n_rounds - 1 - round_index))
+        # train_test_split already shuffled the rows, so a prefix is a random subsample
+        round_features, round_labels = features[:n_rows], labels[:n_rows]
+
+        futures = {
+            executor.submit(
+                cross_validate_candidate, candidates[index], round_features, round_labels,
+                folds, deadline, random_state,
+            ): index
+            for index in survivors
+        }
+
+        round_scores = {}
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=max(deadline - time.perf_counter(), 0), return_when=FIRST_COMPLETED)
+            if not done:
+                # Out of time: drop whatever has not started yet
+                for future in pending:
+                    future.cancel()
+                break
+            for future in done:
+                index = futures[future]
+                try:
+                    outcome = future.result()
+                except Exception as e:
+                    history[index]["rounds"].append({"samples": n_rows, "error": str(e)})
+                    continue
+                history[index]["rounds"].append({
+                    "samples": n_rows,
+                    "scores": outcome["scores"],
+                    "mean": float(np.mean(outcome["scores"])) if outcome["scores"] else None,
+                    "seconds": round(outcome["seconds"], 4),
+                    "complete": outcome["complete"],
+                })
+                if outcome["complete"]:
+                    round_scores[index] = float(np.mean(outcome["scores"]))
+
+        if round_scores:
+            best_index = max(round_scores, key=round_scores.get)
+            best = {"index": best_index, "samples": n_rows}
+
+        if time.perf_counter() >= deadline:
+            budget_exhausted = round_index < n_rounds - 1 or len(round_scores) < len(survivors)
+            break
+
+        # Keep the top 1/eta for the next, larger round
+        ranked = sorted(round_scores, key=round_scores.get, reverse=True)
+        survivors = ranked[:max(math.ceil(len(ranked) / eta), 1)]
+        if not survivors:
+            break
+
+    result = {
+        "best": None,
+        "candidates": history,
+        "rounds": n_rounds,
+        "folds": folds,
+        "budget_seconds": time_budget,
+        "elapsed_seconds": round(time.perf_counter() - started, 4),
+        "budget_exhausted": budget_exhausted,
+    }
+    if best is not None:
+        entry = history[best["index"]]
+        scores = next(r["scores"] for r in reversed(entry["rounds"]) if r.get("samples") == best["samples"])
+        result["best"] = {
+            "config": candidates[best["index"]],
+            "samples": best["samples"],
+            "cv_scores": scores,
+            "cv_mean": float(np.mean(scores)),
+            "cv_std": float(np.std(scores)),
+        }
+    return result
@@ -0,0 +1,512 @@
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import socketserver
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent import futures
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlencode
+
+import grpc
+import numpy as np
+from xai_sdk.proto import chat_pb2, chat_pb2_grpc
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Relative weight of each action in the replayed traffic
+DEFAULT_MIX = "login=1,dashboard=4,analyze=2,history=2,chat=2,forgot=1"
+
+LOAD_TEST_PASSWORD = "load-test-password"
+
+# Creates the schema and one user with an API key per virtual user, then
+# prints the credentials as JSON. Runs in a child process with the same
+# environment as the gunicorn workers so it talks to the same database.
+SEED_SCRIPT = """
+import json, sys
+from app import app, db, User, APIKey, hash_password
+users = []
+with app.app_context():
+    db.create_all()
+    for index in range(int(sys.argv[1])):
+        email = f"load-{index}@example.com"
+        user = User.query.filter_by(email=email).first()
+        if user is None:
+            user = User(f"Load Test {index}", email, hash_password(sys.argv[2]))
+            db.session.add(user)
+            db.session.flush()
+        key = APIKey(user.id)
+        db.session.add(key)
+        db.session.commit()
+        users.append({"email": email, "api_key": key.key})
+print(json.dumps(users))
+"""
+
+
+# ----------------- STAND-IN SERVERS -----------------
+class StandInStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {}
+
+    def hit(self, name):
+        with self._lock:
+            self.counts[name] = self.counts.get(name, 0) + 1
+
+
+class SMTPSinkHandler(socketserver.StreamRequestHandler):
+    """
+    Just enough SMTP for smtplib: EHLO, AUTH PLAIN/LOGIN, MAIL, RCPT and
+    DATA. Messages are counted and discarded.
+    """
+
+    def reply(self, line):
+        self.wfile.write(line.encode("ascii") + b"\r\n")
+
+    def handle(self):
+        self.reply("220 load-test SMTP sink")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode("ascii", errors="replace").strip()
+            verb = command.split(" ", 1)[0].upper()
+            if verb in ("EHLO", "HELO"):
+                self.reply("250-load-test")
+                self.reply("250 AUTH PLAIN LOGIN")
+            elif verb == "AUTH":
+                parts = command.split()
+                if parts[1].upper() == "LOGIN":
+                    # Username and password are each sent after a 334 prompt
+                    for prompt in ("VXNlcm5hbWU6", "UGFzc3dvcmQ6"):
+                        self.reply(f"334 {prompt}")
+                        self.rfile.readline()
+                elif len(parts) == 2:
+                    self.reply("334 ")
+                    self.rfile.readline()
+                self.reply("235 Authentication successful")
+            elif verb in ("MAIL", "RCPT", "RSET", "NOOP"):
+                self.reply("250 OK")
+            elif verb == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                while self.rfile.readline() not in (b".\r\n", b".\n", b""):
+                    pass
+                time.sleep(self.server.latency)
+                self.server.stats.hit("smtp_messages")
+                self.reply("250 OK: queued")
+            elif verb == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+
+class SMTPSink(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, latency, stats):
+        super().__init__(address, SMTPSinkHandler)
+        self.latency = latency
+        self.stats = stats
+
+
+class HTTPStandInHandler(BaseHTTPRequestHandler):
+    """
+    Resend-compatible POST /emails and the OpenAI-compatible GET /v1/models
+    the app uses for listing Grok models.
+    """
+    protocol_version = "HTTP/1.1"
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if self.path.rstrip("/") != "/emails":
+            self.send_json(404, {"message": "Not found"})
+            return
+        time.sleep(self.server.latency)
+        self.server.stats.hit("resend_emails")
+        self.send_json(200, {"id": str(uuid.uuid4())})
+
+    def do_GET(self):
+        if self.path.rstrip("/") != "/v1/models":
+            self.send_json(404, {"message": "Not found"})
+            return
+        self.send_json(200, {
+            "object": "list",
+            "data": [{"id": "grok-1.5-flash", "object": "model", "created": 0, "owned_by": "load-test"}],
+        })
+
+    def log_message(self, format, *args):
+        pass
+
+
+class HTTPStandIn(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency, stats):
+        super().__init__(address, HTTPStandInHandler)
+        self.latency = latency
+        self.stats = stats
+
+
+class ChatStandIn(chat_pb2_grpc.ChatServicer):
+    """xAI-compatible gRPC Chat service that answers GetCompletion after a fixed delay."""
+
+    def __init__(self, latency, stats):
+        self.latency = latency
+        self.stats = stats
+
+    def GetCompletion(self, request, context):
+        time.sleep(self.latency)
+        self.stats.hit("xai_completions")
+        return chat_pb2.GetChatCompletionResponse(
+            id=str(uuid.uuid4()),
+            model=request.model,
+            outputs=[chat_pb2.CompletionOutput(
+                index=0,
+                finish_reason="REASON_STOP",
+                message=chat_pb2.CompletionMessage(content="This is a load-test reply.", role="ROLE_ASSISTANT"),
+            )],
+        )
+
+
+def free_port():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def start_stand_ins(args, stats):
+    """Starts the SMTP sink, Resend stand-in and xAI stand-in on free local ports."""
+    smtp = SMTPSink(("127.0.0.1", 0), args.smtp_latency_ms / 1000, stats)
+    http_server = HTTPStandIn(("127.0.0.1", 0), args.resend_latency_ms / 1000, stats)
+    for server in (smtp, http_server):
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    grpc_server = grpc.server(futures.ThreadPoolExecutor(max_workers=args.users * 2))
+    chat_pb2_grpc.add_ChatServicer_to_server(ChatStandIn(args.xai_latency_ms / 1000, stats), grpc_server)
+    grpc_port = grpc_server.add_insecure_port("127.0.0.1:0")
+    grpc_server.start()
+
+    return {
+        "smtp": smtp,
+        "http": http_server,
+        "grpc": grpc_server,
+        "ports": {
+            "smtp": smtp.server_address[1],
+            "http": http_server.server_address[1],
+            "grpc": grpc_port,
+        },
+    }
+
+
+def stop_stand_ins(stand_ins):
+    stand_ins["smtp"].shutdown()
+    stand_ins["http"].shutdown()
+    stand_ins["grpc"].stop(grace=None)
+
+
+# ----------------- APP UNDER TEST -----------------
+def app_environment(args, ports, app_port, work_dir):
+    http_base = f"http://127.0.0.1:{ports['http']}"
+    return {
+        **os.environ,
+        "DATABASE_URL": args.database_url or f"sqlite:///{os.path.join(work_dir, 'load_test.db')}",
+        "SECRET_KEY": "load-test-secret",
+        "BASE_URL": f"http://127.0.0.1:{app_port}",
+        "SESSION_COOKIE_SECURE": "false",
+        "REMEMBER_COOKIE_SECURE": "false",
+        "GUNICORN_THREADS": str(args.threads),
+        "EMAIL_BACKEND": args.email_backend,
+        "MAIL_SERVER": "127.0.0.1",
+        "MAIL_PORT": str(ports["smtp"]),
+        "MAIL_USE_TLS": "false",
+        "MAIL_USE_SSL": "false",
+        "MAIL_USERNAME": "load-test",
+        "MAIL_PASSWORD": "load-test",
+        "MAIL_DEFAULT_SENDER": "load-test@example.com",
+        "RESEND_API_KEY": "load-test",
+        "RESEND_API_BASE": http_base,
+        "RESEND_FROM_EMAIL": "load-test@example.com",
+        "XAI_API_KEY": "load-test",
+        "XAI_API_HOST": f"127.0.0.1:{ports['grpc']}",
+        "XAI_API_BASE": f"{http_base}/v1",
+        "XAI_USE_INSECURE_CHANNEL": "true",
+    }
+
+
+def seed_database(env, users):
+    completed = subprocess.run(
+        [sys.executable, "-c", SEED_SCRIPT, str(users), LOAD_TEST_PASSWORD],
+        cwd=REPO_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    # The app may log to stdout while importing; the credentials are the last line
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def start_gunicorn(args, env, port, log_file):
+    command = [
+        sys.executable, "-m", "gunicorn",
+        "--bind", f"127.0.0.1:{port}",
+        "--workers", str(args.workers),
+        "--threads", str(args.threads),
+        "--worker-class", "gthread",
+        "--timeout", "300",
+        "app:app",
+    ]
+    process = subprocess.Popen(command, cwd=REPO_DIR, env=env, stdout=log_file, stderr=subprocess.STDOUT)
+
+    deadline = time.monotonic() + args.startup_timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"gunicorn exited with code {process.returncode}; see {log_file.name}")
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+            connection.request("GET", "/")
+            connection.getresponse().read()
+            connection.close()
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"gunicorn did not start within {args.startup_timeout} seconds; see {log_file.name}")
+
+
+# ----------------- TRAFFIC -----------------
+def multipart_body(fields, files):
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields.items():
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode("utf-8")
+        )
+    for name, (filename, content) in files.items():
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+            "Content-Type: application/octet-stream\r\n\r\n".encode("utf-8") + content + b"\r\n"
+        )
+    parts.append(f"--{boundary}--\r\n".encode("utf-8"))
+    return b"".join(parts), f"multipart/form-data; boundary={boundary}"
+
+
+class VirtualUser:
+    """
+    One simulated browser/API client: a keep-alive connection, a cookie jar
+    and the user's API key. Redirects are not followed, so each sample is
+    the latency of exactly one route.
+    """
+
+    def __init__(self, port, credentials, dataset, recorder):
+        self.port = port
+        self.email = credentials["email"]
+        self.api_key = credentials["api_key"]
+        self.dataset = dataset
+        self.recorder = recorder
+        self.cookies = {}
+        self.connection = None
+
+    def request(self, route, method, path, body=None, headers=None):
+        headers = dict(headers or {})
+        if self.cookies:
+            headers["Cookie"] = "; ".join(f"{name}={value}" for name, value in self.cookies.items())
+
+        started = time.perf_counter()
+        try:
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection("127.0.0.1", self.port, timeout=300)
+            self.connection.request(method, path, body=body, headers=headers)
+            response = self.connection.getresponse()
+            response.read()
+            status = response.status
+            for header in response.headers.get_all("Set-Cookie") or []:
+                cookie = SimpleCookie(header)
+                for name, morsel in cookie.items():
+                    self.cookies[name] = morsel.value
+        except (OSError, http.client.HTTPException):
+            status = None
+            if self.connection is not None:
+                self.connection.close()
+            self.connection = None
+        self.recorder.record(route, time.perf_counter() - started, status)
+        return status
+
+    def post_form(self, route, fields):
+        return self.request(route, "POST", "/", urlencode(fields),
+                            {"Content-Type": "application/x-www-form-urlencoded"})
+
+    def login(self):
+        return self.post_form("POST / (login)", {"action": "login", "email": self.email, "password": LOAD_TEST_PASSWORD})
+
+    def dashboard(self):
+        return self.request("GET /dashboard", "GET", "/dashboard")
+
+    def history(self):
+        return self.request("GET /analysis-history", "GET", "/analysis-history")
+
+    def analyze(self):
+        body, content_type = multipart_body({}, {"dataset": ("Rice_Cammeo_Osmancik.csv", self.dataset)})
+        return self.request("POST /api/analyze", "POST", "/api/analyze", body, {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": content_type,
+        })
+
+    def chat(self):
+        return self.request("POST /ask", "POST", "/ask", json.dumps({"message": "Summarize my last analysis."}),
+                            {"Content-Type": "application/json"})
+
+    def forgot(self):
+        return self.post_form("POST / (forgot)", {"action": "forgot", "email": self.email})
+
+
+class Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = {}
+
+    def record(self, route, seconds, status):
+        with self._lock:
+            self.samples.setdefault(route, []).append((seconds, status))
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        action, _, weight = part.partition("=")
+        action = action.strip()
+        if not hasattr(VirtualUser, action) or action in ("request", "post_form"):
+            raise argparse.ArgumentTypeError(f"Unknown action '{action}' in traffic mix.")
+        mix[action] = float(weight or 1)
+    return mix
+
+
+def run_user(user, mix, deadline, think_seconds, rng):
+    actions, weights = list(mix), list(mix.values())
+    user.login()
+    while time.monotonic() < deadline:
+        action = rng.choices(actions, weights)[0]
+        # Logging out is not part of the mix, so every action after the first login is authenticated
+        getattr(user, action)()
+        if think_seconds:
+            time.sleep(rng.uniform(0, 2 * think_seconds))
+    if user.connection is not None:
+        user.connection.close()
+
+
+def report(recorder, elapsed):
+    rows = []
+    for route, samples in sorted(recorder.samples.items()):
+        latencies = np.array([seconds for seconds, _ in samples]) * 1000
+        errors = sum(1 for _, status in samples if status is None or status >= 400)
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        rows.append({
+            "route": route,
+            "requests": len(samples),
+            "errors": errors,
+            "throughput_rps": round(len(samples) / elapsed, 2),
+            "p50_ms": round(float(p50), 1),
+            "p95_ms": round(float(p95), 1),
+            "p99_ms": round(float(p99), 1),
+        })
+    return rows
+
+
+def main():
+    """
+    Starts the app under gunicorn with local stand-ins for SMTP, Resend and
+    xAI, replays a weighted mix of user traffic from concurrent virtual
+    users, and reports throughput and p50/p95/p99 latency per route.
+    """
+    parser = argparse.ArgumentParser(description="Load-test the app under gunicorn against local stand-ins for external services.")
+    parser.add_argument("--users", type=int, default=10, help="Concurrent virtual users. Defaults to 10.")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds of traffic to replay. Defaults to 30.")
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX, help=f"Weighted actions. Defaults to {DEFAULT_MIX}.")
+    parser.add_argument("--think-ms", type=float, default=0, help="Mean pause between a user's requests. Defaults to 0.")
+    parser.add_argument("--workers", type=int, default=2, help="gunicorn worker processes. Defaults to 2, as in the Procfile.")
+    parser.add_argument("--threads", type=int, default=4, help="gunicorn threads per worker. Defaults to 4.")
+    parser.add_argument("--dataset", default=os.path.join(REPO_DIR, "Rice_Cammeo_Osmancik.csv"), help="Dataset uploaded by the analyze action.")
+    parser.add_argument("--email-backend", choices=("smtp", "resend"), default="smtp", help="Backend used by forgot-password. Defaults to smtp.")
+    parser.add_argument("--smtp-latency-ms", type=float, default=200, help="Delay before the SMTP sink accepts a message. Defaults to 200.")
+    parser.add_argument("--resend-latency-ms", type=float, default=150, help="Delay of the Resend stand-in. Defaults to 150.")
+    parser.add_argument("--xai-latency-ms", type=float, default=800, help="Delay of the xAI chat stand-in. Defaults to 800.")
+    parser.add_argument("--database-url", help="Database to test against. Defaults to a temporary SQLite file.")
+    parser.add_argument("--startup-timeout", type=float, default=60, help="Seconds to wait for gunicorn. Defaults to 60.")
+    parser.add_argument("--seed", type=int, default=100, help="Random seed for the traffic mix. Defaults to 100.")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON.")
+    args = parser.parse_args()
+
+    with open(args.dataset, "rb") as handle:
+        dataset = handle.read()
+
+    stats = StandInStats()
+    stand_ins = start_stand_ins(args, stats)
+    work_dir = tempfile.mkdtemp(prefix="load-test-")
+    app_port = free_port()
+    env = app_environment(args, stand_ins["ports"], app_port, work_dir)
+    log_path = os.path.join(work_dir, "gunicorn.log")
+
+    with open(log_path, "w") as log_file:
+        credentials = seed_database(env, args.users)
+        process = start_gunicorn(args, env, app_port, log_file)
+        try:
+            recorder = Recorder()
+            rng = random.Random(args.seed)
+            users = [VirtualUser(app_port, credentials[i], dataset, recorder) for i in range(args.users)]
+            started = time.monotonic()
+            deadline = started + args.duration
+            threads = [
+                threading.Thread(target=run_user, args=(user, args.mix, deadline, args.think_ms / 1000, random.Random(rng.random())))
+                for user in users
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.monotonic() - started
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+            stop_stand_ins(stand_ins)
+
+    rows = report(recorder, elapsed)
+    total = sum(row["requests"] for row in rows)
+    if args.json:
+        print(json.dumps({
+            "elapsed_seconds": round(elapsed, 2),
+            "throughput_rps": round(total / elapsed, 2),
+            "routes": rows,
+            "stand_ins": stats.counts,
+            "gunicorn_log": log_path,
+        }, indent=2))
+        return
+
+    print("-" * 88)
+    print(f"{args.users} users, {args.workers} workers x {args.threads} threads, {elapsed:.1f} s, "
+          f"{total} requests, {total / elapsed:.1f} req/s")
+    print("-" * 88)
+    print(f"{'route':<24} {'requests':>9} {'errors':>7} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for row in rows:
+        print(f"{row['route']:<24} {row['requests']:>9} {row['errors']:>7} {row['throughput_rps']:>8.2f} "
+              f"{row['p50_ms']:>9.1f} {row['p95_ms']:>9.1f} {row['p99_ms']:>9.1f}")
+    print("-" * 88)
+    print("Stand-ins: " + ", ".join(f"{name} {count}" for name, count in sorted(stats.counts.items())))
+    print(f"gunicorn log: {log_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,207 @@
+import os
+import time
+import hashlib
+import threading
+
 import pandas as pd
 import numpy as np
+import sklearn
 from sklearn.linear_model import LogisticRegression
 from sklearn.metrics import accuracy_score, confusion_matrix
 from sklearn.model_selection import train_test_split
 from sklearn.impute import SimpleImputer
+from threadpoolctl import ThreadpoolController
+
+SKLEARN_VERSION = tuple(int(part) for part in sklearn.__version__.split(".")[:2])
+
+# Only the first ROW_LIMIT rows of an upload are used for training
+ROW_LIMIT = 50000
+
+# Targets with more distinct values than this share of rows are treated as
+# regression problems and rejected
+MAX_TARGET_UNIQUE_RATIO = 0.5
+
+# Inspecting the loaded BLAS libraries is slow, so do it once per process
+# rather than on every fit.
+threadpool_controller = ThreadpoolController()
+
+# The BLAS thread count the process started with, before the limit below.
+# solver_benchmark.py runs the fixed baseline on it, as the service used to.
+DEFAULT_BLAS_THREADS = max(
+    (library["num_threads"] for library in threadpool_controller.select(user_api="blas").info()),
+    default=1,
+)
+
+# BLAS thread limits are process-wide, not per thread. gunicorn threads, batch
+# workers and the hyperparameter search all fit side by side, so the process
+# runs BLAS single-threaded (set once, when each worker imports this module)
+# and only multithreaded fits raise it, one at a time, restoring it afterwards.
+threadpool_controller.limit(limits=1, user_api="blas")
+multithreaded_fit_lock = threading.Lock()
+
+# The configuration every run used before solver selection existed.
+# Kept as the baseline for solver_benchmark.py. Back then fits ran on the
+# default BLAS thread count; threads=None now means a single thread.
+FIXED_SOLVER_CONFIG = {
+    "name": "lbfgs",
+    "tol": 1e-4,
+    "max_iter": 1000,
+    "threads": None,
+    "reason": "fixed configuration",
+}
+
+
+def select_solver(n_samples: int, n_features: int, n_classes: int) -> dict:
+    """
+    Picks the LogisticRegression tolerance and BLAS thread count from the
+    shape of the prepared training data. The solver is always lbfgs.
+
+    Returns a dict describing the choice so it can be reported with the results.
+    """
+    cpu_count = os.cpu_count() or 1
+    cells = n_samples * max(n_features, 1)
+
+    # split_data() standardizes every feature, so the fitted matrix is always
+    # dense, and lbfgs beat liblinear and saga on every dense shape in
+    # solver_benchmark.py. Large problems get a looser tolerance
+    # (fewer iterations, same test accuracy) and, when multiclass, the BLAS
+    # thread pool. Small ones stay single-threaded to avoid fighting the
+    # gunicorn worker threads.
+    large = cells >= 1_000_000
+    threads = cpu_count if large and n_classes > 2 else 1
+    return {
+        "name": "lbfgs",
+        "tol": 1e-3 if large else 1e-4,
+        "max_iter": 1000,
+        "threads": threads,
+        "reason": ("large dense data" if large else "dense data")
+        + (" with multithreaded BLAS" if threads > 1 else ""),
+    }
+
+
+def penalty_params(penalty: str) -> dict:
+    # scikit-learn 1.8 deprecated `penalty` in favour of `l1_ratio`, but the
+    # pinned 1.5 ignores l1_ratio unless penalty="elasticnet".
+    if SKLEARN_VERSION >= (1, 8):
+        return {"l1_ratio": 1.0 if penalty == "l1" else 0.0}
+    return {"penalty": penalty}
+
+
+def fit_logistic_regression(features, labels, solver_config: dict, random_state: int = 100, initial_state: dict = None) -> tuple:
+    """
+    Fits a LogisticRegression using a config from select_solver().
+    initial_state ({"coef": ..., "intercept": ...}) warm-starts the solver
+    from previously trained coefficients.
+    Returns the fitted model and the wall-clock training time in seconds.
+    """
+    model = LogisticRegression(
+        random_state=random_state,
+        solver=solver_config["name"],
+        tol=solver_config["tol"],
+        max_iter=solver_config["max_iter"],
+        C=solver_config.get("C", 1.0),
+        **penalty_params(solver_config.get("penalty", "l2")),
+    )
+    if initial_state is not None:
+        model.warm_start = True
+        model.coef_ = np.array(initial_state["coef"], dtype=float)
+        model.intercept_ = np.array(initial_state["intercept"], dtype=float)
+
+    started = time.perf_counter()
+    threads = solver_config["threads"] or 1
+    if threads > 1:
+        # Serialized so overlapping limits can't exit out of order and leave
+        # the process on the wrong thread count
+        with multithreaded_fit_lock, threadpool_controller.limit(limits=threads, user_api="blas"):
+            model.fit(features, labels)
+    else:
+        model.fit(features, labels)
+    return model, time.perf_counter() - started
+
+
+def rows_fingerprint(frame: pd.DataFrame, prefix_rows: int = 0) -> tuple:
+    """
+    Content hash of a frame's rows, used to detect append-only re-uploads.
+    Returns (hash of all rows, hash of the first prefix_rows rows or None);
+    the rows are hashed once and the prefix digest is extended, not redone.
+    """
+    row_hashes = pd.util.hash_pandas_object(frame, index=False).to_numpy()
+    digest = hashlib.sha256()
+    prefix_hash = None
+    if 0 < prefix_rows <= len(row_hashes):
+        digest.update(row_hashes[:prefix_rows].tobytes())
+        prefix_hash = digest.copy().hexdigest()
+        row_hashes = row_hashes[prefix_rows:]
+    digest.update(row_hashes.tobytes())
+    return digest.hexdigest(), prefix_hash
+
+
+def column_moments(values: pd.DataFrame) -> dict:
+    """Count, mean and sum of squared deviations per column (Welford form)."""
+    mean = values.mean()
+    return {
+        "count": len(values),
+        "mean": mean.to_numpy(dtype=float),
+        "m2": ((values - mean) ** 2).sum().to_numpy(dtype=float),
+    }
+
+
+def merge_moments(a: dict, b: dict) -> dict:
+    # Chan et al.'s parallel update: combines two partitions' moments exactly
+    count = a["count"] + b["count"]
+    if b["count"] == 0:
+        return a
+    delta = b["mean"] - a["mean"]
+    return {
+        "count": count,
+        "mean": a["mean"] + delta * b["count"] / count,
+        "m2": a["m2"] + b["m2"] + delta ** 2 * a["count"] * b["count"] / count,
+    }
+
 
 class LogisticsRunner:
-    def __init__(self, data: pd.DataFrame, random_state: int = 100):
+    def __init__(self, data: pd.DataFrame, random_state: int = 100, previous_state: dict = None, track_rows: bool = False):
         # Enforce a row limit to prevent memory issues
-        if len(data) > 50000:
-            data = data.head(50000)
+        if len(data) > ROW_LIMIT:
+            data = data.head(ROW_LIMIT)
             
         self.data = data
         self.random_state = random_state
         self.target_column = data.columns[-1]
         self.feature_columns = [col for col in data.columns[:-1] if pd.api.types.is_numeric_dtype(data[col])]
 
+        # model_state from an earlier run on the same dataset, for incremental retraining
+        self.previous_state = previous_state if self.matches_schema(previous_state) else None
+        # Fingerprinting costs about as much as a full normalization pass, so
+        # it's only done when a later run may reuse this one (track_rows) or
+        # this run is reusing an earlier one
+        self.track_rows = track_rows or previous_state is not None
+        self.reused_rows = 0
+        self.imputed = False
+
+    def matches_schema(self, state: dict) -> bool:
+        return bool(state) and (
+            state.get("feature_columns") == [str(col) for col in self.feature_columns]
+            and state.get("target_column") == str(self.target_column)
+        )
+
+    def fingerprint_rows(self):
+        """
+        Hashes the raw rows for the next incremental run. If the upload
+        starts with exactly the rows the previous run saw (an append-only
+        re-upload), also remembers how many, so their normalization
+        statistics can be reused instead of recomputed.
+        Returns (row_count, row_hash), or (None, None) when not tracking rows.
+        """
+        if not self.track_rows:
+            return None, None
+        state = self.previous_state or {}
+        previous_rows = state.get("row_count") or 0
+        row_hash, prefix_hash = rows_fingerprint(self.data[self.feature_columns + [self.target_column]], previous_rows)
+        if prefix_hash is not None and prefix_hash == state.get("row_hash"):
+            self.reused_rows = previous_rows
+        return len(self.data), row_hash
+
     def preprocess_data(self) -> pd.DataFrame:
         # Keep only feature columns and the target column
         self.data = self.data[self.feature_columns + [self.target_column]]
@@ -24,17 +210,41 @@ class LogisticsRunner:
         if self.data[self.feature_columns].isnull().any().any():
             imputer = SimpleImputer(strategy='mean')
             self.data[self.feature_columns] = imputer.fit_transform(self.data[self.feature_columns])
+            self.imputed = True
 
         if self.data.isnull().any().any():
             raise ValueError("Dataset contains missing values in the target column. Please clean the data before uploading.")
 
         return self.data
 
+    def normalization_stats(self, dataset: pd.DataFrame) -> tuple:
+        """
+        Returns the per-feature mean and standard deviation. For append-only
+        re-uploads only the new rows are scanned and merged into the stored
+        moments; imputation changes old rows too, so it forces a full pass.
+        """
+        values = dataset[self.feature_columns]
+        if self.reused_rows and not self.imputed:
+            stored = self.previous_state["normalization"]
+            previous = {
+                "count": stored["count"],
+                "mean": np.array(stored["mean"], dtype=float),
+                "m2": np.array(stored["m2"], dtype=float),
+            }
+            moments = merge_moments(previous, column_moments(values.iloc[self.reused_rows:]))
+        else:
+            self.reused_rows = 0
+            moments = column_moments(values)
+
+        self.normalization = moments
+        mean = pd.Series(moments["mean"], index=self.feature_columns)
+        std = pd.Series(np.sqrt(moments["m2"] / max(moments["count"] - 1, 1)), index=self.feature_columns)
+        return mean, std
+
     def split_data(self, dataset: pd.DataFrame) -> dict:
         # Normalize numerical features
         numerical_features = self.feature_columns
-        feature_mean = dataset[numerical_features].mean()
-        feature_std = dataset[numerical_features].std()
+        feature_mean, feature_std = self.normalization_stats(dataset)
         normalized_dataset = dataset.copy()
         normalized_dataset[numerical_features] = (dataset[numerical_features] - feature_mean) / feature_std
         
@@ -42,7 +252,7 @@ class LogisticsRunner:
         target_series = normalized_dataset[self.target_column]
 
         # Check if the target variable looks like a regression problem
-        if target_series.nunique() / len(target_series) > 0.5:
+        if target_series.nunique() / len(target_series) > MAX_TARGET_UNIQUE_RATIO:
             raise ValueError(f"The target column '{self.target_column}' has too many unique values and appears to be a regression problem, not a classification problem. This tool is for classification tasks only.")
 
         # Convert target variable to numerical classes
@@ -64,15 +274,84 @@ class LogisticsRunner:
             "test_labels": y_test,
         }
 
-    def run_experiment(self) -> dict:
+    def select_solver(self, split_data: dict) -> dict:
+        train_features = split_data["train_features"]
+        n_samples, n_features = train_features.shape
+
+        return select_solver(n_samples, n_features, len(self.class_labels))
+
+    def search_hyperparameters(self, split_data: dict, time_budget: float) -> dict:
+        # Imported here because hyperparameter_search builds on this module
+        from hyperparameter_search import successive_halving_search
+
+        return successive_halving_search(
+            split_data["train_features"],
+            split_data["train_labels"],
+            n_classes=len(self.class_labels),
+            time_budget=time_budget,
+            random_state=self.random_state,
+        )
+
+    def warm_start_state(self, searched: bool) -> tuple:
+        """
+        Decides whether the previous run's coefficients can seed this fit.
+        Returns (initial_state or None, report dict or None when there was
+        no previous run to compare with).
+        """
+        state = self.previous_state
+        if state is None:
+            return None, None
+
+        report = {
+            "warm_start": False,
+            "reused_rows": self.reused_rows,
+            "new_rows": len(self.data) - self.reused_rows,
+        }
+        if searched:
+            report["reason"] = "hyperparameter search requested"
+        elif state.get("class_labels") != [str(label) for label in self.class_labels]:
+            report["reason"] = "target classes changed"
+        elif state["solver"]["name"] == "liblinear":
+            # liblinear ignores warm_start
+            report["reason"] = "previous solver does not support warm start"
+        else:
+            report["warm_start"] = True
+            return {"coef": state["coef"], "intercept": state["intercept"]}, report
+        return None, report
+
+    def run_experiment(self, search_budget: float = None) -> dict:
+        """
+        Trains and evaluates the model. When search_budget (seconds) is given,
+        first runs a cross-validated search over regularization strength and
+        penalty within that budget and trains with the best configuration.
+        """
+        # Fingerprint the raw rows before preprocessing changes them
+        row_count, row_hash = self.fingerprint_rows()
+
         processed_data = self.preprocess_data()
         split_data = self.split_data(processed_data)
 
-        # Use Scikit-learn's Logistic Regression, configured for multiclass
-        model = LogisticRegression(random_state=self.random_state, solver='lbfgs', max_iter=1000)
-        
+        # Pick the solver from the shape of the prepared training data
+        solver_config = self.select_solver(split_data)
+
+        search = None
+        if search_budget:
+            search = self.search_hyperparameters(split_data, search_budget)
+            if search["best"] is not None:
+                solver_config = {**search["best"]["config"], "reason": "hyperparameter search"}
+
+        initial_state, incremental = self.warm_start_state(search is not None)
+        if initial_state is not None:
+            solver_config = {**self.previous_state["solver"], "reason": "warm start from previous run"}
+
         # Train the model
-        model.fit(split_data["train_features"], split_data["train_labels"])
+        model, training_seconds = fit_logistic_regression(
+            split_data["train_features"],
+            split_data["train_labels"],
+            solver_config,
+            random_state=self.random_state,
+            initial_state=initial_state,
+        )
 
         # Make predictions and calculate accuracy
         y_pred = model.predict(split_data["test_features"])
@@ -85,5 +364,24 @@ class LogisticsRunner:
             "test_accuracy": test_accuracy,
             "feature_columns": self.feature_columns,
             "confusion_matrix": cm.tolist(),
-            "class_labels": self.class_labels
-        }
\ No newline at end of file
+            "class_labels": self.class_labels,
+            "solver": solver_config,
+            "training_seconds": round(training_seconds, 4),
+            **({"search": search} if search is not None else {}),
+            **({"incremental": incremental} if incremental is not None else {}),
+            "model_state": {
+                "feature_columns": [str(col) for col in self.feature_columns],
+                "target_column": str(self.target_column),
+                "class_labels": [str(label) for label in self.class_labels],
+                "solver": {key: value for key, value in solver_config.items() if key != "reason"},
+                "coef": model.coef_.tolist(),
+                "intercept": model.intercept_.tolist(),
+                "normalization": {
+                    "count": int(self.normalization["count"]),
+                    "mean": self.normalization["mean"].tolist(),
+                    "m2": self.normalization["m2"].tolist(),
+                },
+                "row_count": row_count,
+                "row_hash": row_hash,
+            },
+        }
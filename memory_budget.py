@@ -0,0 +1,176 @@
+import os
+
+from dataset_reader import detect_format, read_dataset
+from logistics_runner import ROW_LIMIT
+
+# Rows parsed to measure the in-memory size of one row
+SNIFF_ROWS = 500
+
+# Raw CSV text read to measure the average on-disk size of one row
+SNIFF_BYTES = 64 * 1024
+
+# Assumed decompressed/compressed size ratio for .csv.gz and .csv.zst
+COMPRESSED_CSV_EXPANSION = 4
+
+# Peak memory of a training run relative to the parsed DataFrame: the parsed
+# frame, the imputed/normalized copies and the train/test split all coexist.
+PIPELINE_MEMORY_FACTOR = 4
+
+# Below this many rows a downsampled run is not worth doing
+MIN_DOWNSAMPLE_ROWS = 1000
+
+CGROUP_V2_LIMIT = "/sys/fs/cgroup/memory.max"
+CGROUP_V2_USAGE = "/sys/fs/cgroup/memory.current"
+CGROUP_V1_LIMIT = "/sys/fs/cgroup/memory/memory.limit_in_bytes"
+CGROUP_V1_USAGE = "/sys/fs/cgroup/memory/memory.usage_in_bytes"
+
+# cgroup v1 reports "no limit" as a huge page-aligned number
+UNLIMITED_THRESHOLD = 1 << 60
+
+
+class MemoryBudgetExceeded(ValueError):
+    """Raised when a dataset would not fit in memory even after downsampling."""
+
+
+def read_int_file(path: str):
+    try:
+        with open(path) as handle:
+            value = handle.read().strip()
+    except OSError:
+        return None
+    if not value or value == "max":
+        return None
+    try:
+        value = int(value)
+    except ValueError:
+        return None
+    return value if value < UNLIMITED_THRESHOLD else None
+
+
+def meminfo_available():
+    try:
+        with open("/proc/meminfo") as handle:
+            for line in handle:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def available_memory():
+    """
+    Returns the bytes this container can still allocate: the cgroup limit
+    minus current cgroup usage, or MemAvailable when there is no limit.
+    """
+    for limit_path, usage_path in ((CGROUP_V2_LIMIT, CGROUP_V2_USAGE), (CGROUP_V1_LIMIT, CGROUP_V1_USAGE)):
+        limit = read_int_file(limit_path)
+        if limit is not None:
+            usage = read_int_file(usage_path) or 0
+            return max(limit - usage, 0)
+    return meminfo_available()
+
+
+def stream_size(stream) -> int:
+    position = stream.tell()
+    stream.seek(0, os.SEEK_END)
+    size = stream.tell()
+    stream.seek(position)
+    return size
+
+
+def csv_bytes_per_row(stream, compression):
+    """Average size of one CSV line, measured on the first SNIFF_BYTES of text."""
+    if compression == "gzip":
+        import gzip
+        # Explicit mode: GzipFile otherwise guesses from stream.mode, and
+        # SpooledTemporaryFile defaults to "w+b"
+        text = gzip.GzipFile(fileobj=stream, mode="rb").read(SNIFF_BYTES)
+    elif compression == "zstd":
+        import zstandard
+        text = zstandard.ZstdDecompressor().stream_reader(stream, closefd=False).read(SNIFF_BYTES)
+    else:
+        text = stream.read(SNIFF_BYTES)
+    stream.seek(0)
+
+    lines = text.count(b"\n")
+    if lines <= 1:
+        return None
+    # The header line is part of the sample but not a data row
+    return len(text) / (lines - 1)
+
+
+def columnar_row_count(stream, file_format):
+    import pyarrow.ipc as ipc
+    import pyarrow.parquet as pq
+
+    if file_format == "parquet":
+        rows = pq.ParquetFile(stream).metadata.num_rows
+    else:
+        # The IPC footer has no row count. Decode a single column per batch
+        # and stop once past ROW_LIMIT, since only that many rows are used.
+        reader = ipc.open_file(stream, options=ipc.IpcReadOptions(included_fields=[0]))
+        rows = 0
+        for i in range(reader.num_record_batches):
+            rows += reader.get_batch(i).num_rows
+            if rows > ROW_LIMIT:
+                break
+    stream.seek(0)
+    return rows
+
+
+def estimate_rows(stream, filename: str):
+    file_format, compression = detect_format(filename)
+    if file_format != "csv":
+        return columnar_row_count(stream, file_format)
+
+    bytes_per_row = csv_bytes_per_row(stream, compression)
+    if not bytes_per_row:
+        return 0
+    text_size = stream_size(stream) * (COMPRESSED_CSV_EXPANSION if compression else 1)
+    return int(text_size / bytes_per_row)
+
+
+def plan_dataset_read(file, filename: str = None, budget_bytes: int = None, selection: dict = None) -> dict:
+    """
+    Estimates the memory a training run on this upload would need from its
+    size and a small parsed sample of the selected columns, and decides
+    whether to accept it, parse only the first rows that fit, or reject it.
+
+    Returns a plan dict; 'rows' is the nrows to pass to read_dataset().
+    """
+    filename = filename or getattr(file, "filename", "")
+    stream = getattr(file, "stream", file)
+    if budget_bytes is None:
+        budget_bytes = available_memory()
+
+    sample = read_dataset(stream, filename, nrows=SNIFF_ROWS, selection=selection)
+    stream.seek(0)
+
+    estimated_rows = min(estimate_rows(stream, filename), ROW_LIMIT)
+    bytes_per_row = sample.memory_usage(index=True, deep=True).sum() / max(len(sample), 1)
+    bytes_per_row *= PIPELINE_MEMORY_FACTOR
+    estimated_bytes = int(estimated_rows * bytes_per_row)
+
+    plan = {
+        "decision": "accept",
+        "rows": ROW_LIMIT,
+        "estimated_rows": estimated_rows,
+        "estimated_bytes": estimated_bytes,
+        "budget_bytes": budget_bytes,
+    }
+    # No way to tell how much memory is left, so fall back to the row limit alone
+    if budget_bytes is None or estimated_bytes <= budget_bytes:
+        return plan
+
+    affordable_rows = int(budget_bytes / bytes_per_row) if bytes_per_row else 0
+    if affordable_rows < MIN_DOWNSAMPLE_ROWS:
+        raise MemoryBudgetExceeded(
+            f"This dataset needs about {estimated_bytes // (1024 * 1024)} MB to analyze, "
+            f"but only {budget_bytes // (1024 * 1024)} MB is available. "
+            "Please upload a smaller file or fewer columns."
+        )
+
+    plan["decision"] = "downsample"
+    plan["rows"] = affordable_rows
+    return plan
@@ -0,0 +1,172 @@
+import argparse
+import json
+import os
+import tempfile
+import threading
+
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+from dataset_reader import read_dataset
+from logistics_runner import LogisticsRunner
+from static_assets import content_hash
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Built-in datasets for demos and the dashboard's "try it" buttons.
+# 'source' is relative to the repository root.
+SAMPLE_DATASETS = {
+    "rice": {
+        "title": "Rice (Cammeo and Osmancik)",
+        "source": "Rice_Cammeo_Osmancik.csv",
+        "description": "3,810 rice grains described by 7 shape measurements, labelled with one of two varieties.",
+    },
+}
+
+DEFAULT_SAMPLE_DIR = os.path.join(REPO_DIR, "sample_data")
+
+# Rows returned as the data preview, matching the /analyze route
+PREVIEW_ROWS = 100
+
+
+def sample_paths(name: str, directory: str) -> tuple:
+    return os.path.join(directory, f"{name}.arrow"), os.path.join(directory, f"{name}.json")
+
+
+def write_atomically(path: str, write):
+    # Workers may build the same sample at once; readers only ever see a complete file
+    handle, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    try:
+        with os.fdopen(handle, "wb") as temp_file:
+            write(temp_file)
+        # mkstemp creates the file owner-only; every worker user must be able to map it
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def is_built(name: str, directory: str) -> bool:
+    """True when the sample's files exist and were built from the current source."""
+    arrow_path, meta_path = sample_paths(name, directory)
+    if not os.path.exists(arrow_path):
+        return False
+    try:
+        with open(meta_path) as handle:
+            meta = json.load(handle)
+    except (OSError, ValueError):
+        return False
+    return meta.get("source_hash") == content_hash(os.path.join(REPO_DIR, SAMPLE_DATASETS[name]["source"]))
+
+
+def build_sample(name: str, directory: str):
+    """
+    Converts a sample's source file to an uncompressed Arrow IPC file, which
+    can be memory-mapped without decoding, and stores the results of a
+    default run_experiment() next to it.
+    """
+    source = os.path.join(REPO_DIR, SAMPLE_DATASETS[name]["source"])
+    with open(source, "rb") as handle:
+        data = read_dataset(handle, filename=source)
+    table = pa.Table.from_pandas(data, preserve_index=False)
+
+    results = LogisticsRunner(data=data).run_experiment()
+    results.pop("model_state", None)
+
+    os.makedirs(directory, exist_ok=True)
+    arrow_path, meta_path = sample_paths(name, directory)
+
+    def write_table(handle):
+        with ipc.new_file(handle, table.schema) as writer:
+            writer.write_table(table)
+
+    write_atomically(arrow_path, write_table)
+    write_atomically(meta_path, lambda handle: handle.write(json.dumps({
+        "source_hash": content_hash(source),
+        "rows": table.num_rows,
+        "columns": table.column_names,
+        "results": results,
+    }).encode("utf-8")))
+
+
+def build_samples(directory: str = DEFAULT_SAMPLE_DIR, force: bool = False) -> list:
+    """Builds every sample that is missing or out of date. Returns the names built."""
+    built = []
+    for name in SAMPLE_DATASETS:
+        if force or not is_built(name, directory):
+            build_sample(name, directory)
+            built.append(name)
+    return built
+
+
+class SampleCatalogue:
+    """
+    Serves the built samples. Each worker memory-maps the Arrow files, so
+    the data lives once in the OS page cache however many gunicorn workers
+    there are, and the precomputed results are returned without training.
+    Samples are built on first use if the image build didn't already.
+    """
+
+    def __init__(self, directory: str = DEFAULT_SAMPLE_DIR):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._loaded = {}
+
+    def _load(self, name: str) -> dict:
+        loaded = self._loaded.get(name)
+        if loaded is not None:
+            return loaded
+        with self._lock:
+            if name not in self._loaded:
+                if not is_built(name, self.directory):
+                    build_sample(name, self.directory)
+                arrow_path, meta_path = sample_paths(name, self.directory)
+                with open(meta_path) as handle:
+                    meta = json.load(handle)
+                # Zero-copy: the table's buffers point into the mapping
+                meta["table"] = ipc.open_file(pa.memory_map(arrow_path)).read_all()
+                self._loaded[name] = meta
+            return self._loaded[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in SAMPLE_DATASETS
+
+    def listing(self) -> list:
+        return [
+            {"name": name, "title": info["title"], "description": info["description"], "source": info["source"]}
+            for name, info in SAMPLE_DATASETS.items()
+        ]
+
+    def results(self, name: str) -> dict:
+        """The precomputed run_experiment() results, marked as such."""
+        loaded = self._load(name)
+        return {
+            **loaded["results"],
+            "sample": name,
+            "precomputed": True,
+            "rows": loaded["rows"],
+        }
+
+    def preview(self, name: str, rows: int = PREVIEW_ROWS) -> list:
+        # Only the preview rows are converted to pandas
+        return self._load(name)["table"].slice(0, rows).to_pandas().to_dict(orient="records")
+
+
+def main():
+    """
+    Builds the memory-mapped sample datasets and their precomputed results.
+    Run at image build time.
+    """
+    parser = argparse.ArgumentParser(description="Build the built-in sample datasets.")
+    parser.add_argument("directory", nargs="?", default=DEFAULT_SAMPLE_DIR,
+                        help="Output directory. Defaults to ./sample_data.")
+    parser.add_argument("--force", action="store_true", help="Rebuild samples that are already up to date.")
+    args = parser.parse_args()
+
+    built = build_samples(args.directory, force=args.force)
+    print(f"Built {len(built)} of {len(SAMPLE_DATASETS)} sample datasets{': ' + ', '.join(built) if built else ''}.")
+
+
+if __name__ == "__main__":
+    main()
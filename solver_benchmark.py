@@ -0,0 +1,66 @@
+import argparse
+import statistics
+
+import pandas as pd
+from sklearn.metrics import accuracy_score
+
+from logistics_runner import LogisticsRunner, FIXED_SOLVER_CONFIG, DEFAULT_BLAS_THREADS, fit_logistic_regression
+
+
+def time_config(split_data, solver_config, repeats, random_state):
+    """
+    Fits the same split `repeats` times with one solver config.
+    Returns the median training time and the test accuracy.
+    """
+    timings = []
+    accuracy = None
+    for _ in range(repeats):
+        model, seconds = fit_logistic_regression(
+            split_data["train_features"],
+            split_data["train_labels"],
+            solver_config,
+            random_state=random_state,
+        )
+        timings.append(seconds)
+        accuracy = accuracy_score(split_data["test_labels"], model.predict(split_data["test_features"]))
+    return statistics.median(timings), accuracy
+
+
+def main():
+    """
+    Compares the automatically selected solver against the old fixed
+    lbfgs configuration on a CSV file. The fixed configuration is timed on
+    the default BLAS thread count, as it used to run, and on the single
+    thread the service now gives it.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark automatic solver selection against the fixed lbfgs config.")
+    parser.add_argument("dataset", nargs="?", default="Rice_Cammeo_Osmancik.csv", help="CSV file with the target as the last column.")
+    parser.add_argument("--repeats", type=int, default=5, help="Number of fits per configuration. Defaults to 5.")
+    args = parser.parse_args()
+
+    runner = LogisticsRunner(data=pd.read_csv(args.dataset))
+    split_data = runner.split_data(runner.preprocess_data())
+    auto_config = runner.select_solver(split_data)
+
+    print("-" * 60)
+    print(f"Dataset: {args.dataset}")
+    print(f"Shape: {split_data['train_features'].shape}, classes: {len(runner.class_labels)}")
+    print("-" * 60)
+
+    # The process runs BLAS single-threaded, so lift the limit for the old baseline
+    default_config = {**FIXED_SOLVER_CONFIG, "threads": DEFAULT_BLAS_THREADS}
+    fixed_seconds, fixed_accuracy = time_config(split_data, default_config, args.repeats, runner.random_state)
+    single_seconds, single_accuracy = time_config(split_data, FIXED_SOLVER_CONFIG, args.repeats, runner.random_state)
+    auto_seconds, auto_accuracy = time_config(split_data, auto_config, args.repeats, runner.random_state)
+
+    print(f"fixed  {FIXED_SOLVER_CONFIG['name']:<10} {fixed_seconds * 1000:9.2f} ms  accuracy {fixed_accuracy:.4f}  (default BLAS threads: {DEFAULT_BLAS_THREADS})")
+    print(f"fixed  {FIXED_SOLVER_CONFIG['name']:<10} {single_seconds * 1000:9.2f} ms  accuracy {single_accuracy:.4f}  (1 BLAS thread)")
+    print(f"auto   {auto_config['name']:<10} {auto_seconds * 1000:9.2f} ms  accuracy {auto_accuracy:.4f}  ({auto_config['reason']})")
+    if auto_seconds > 0:
+        print(f"Speedup: {fixed_seconds / auto_seconds:.2f}x over the default-thread baseline, "
+              f"{single_seconds / auto_seconds:.2f}x over the single-thread one")
+    print("-" * 60)
+
+
+if __name__ == "__main__":
+    main()
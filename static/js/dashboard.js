@@ -37,89 +37,103 @@ document.addEventListener('DOMContentLoaded', () => {
     themeToggle.addEventListener('change', handleToggleChange);
     // --- End Theme Toggler ---
 
-    if (analysisForm) {
-        analysisForm.addEventListener('submit', async function(event) {
-            event.preventDefault();
+    // Shows the loader while `request` runs, then renders its JSON results
+    async function runAnalysis(request) {
+        // If a chart instance exists, destroy it before creating a new one
+        if (chart) {
+            chart.destroy();
+        }
 
-            const form = event.target;
-            const formData = new FormData(form);
+        loader.style.display = 'block';
+        resultsDiv.style.display = 'none';
+        dataTableContainer.innerHTML = '<p>Your data will appear here after analysis.</p>'; // Reset
 
-            // If a chart instance exists, destroy it before creating a new one
-            if (chart) {
-                chart.destroy();
+        try {
+            const response = await request();
+
+            if (!response.ok) {
+                const errorText = await response.text();
+                throw new Error(`Server error: ${response.status} ${response.statusText}. ${errorText}`);
             }
 
-            loader.style.display = 'block';
-            resultsDiv.style.display = 'none';
-            dataTableContainer.innerHTML = '<p>Your data will appear here after analysis.</p>'; // Reset
+            const results = await response.json();
 
-            try {
-                const response = await fetch('/analyze', {
-                    method: 'POST',
-                    body: formData
+            if (results.error) {
+                alert('Error: ' + results.error);
+            } else {
+                showResults(results);
+            }
+        } catch (error) {
+            console.error('An error occurred:', error);
+            alert('An unexpected error occurred: ' + error.message);
+        } finally {
+            loader.style.display = 'none';
+        }
+    }
+
+    function showResults(results) {
+        accuracySpan.textContent = (results.test_accuracy * 100).toFixed(2) + '%';
+
+        // Render the confusion matrix
+        if (results.confusion_matrix && results.class_labels) {
+            renderConfusionMatrix(results.confusion_matrix, results.class_labels);
+        }
+
+        // Render the data table
+        if (results.data_preview && results.data_preview.length > 0) {
+            const table = document.createElement('table');
+            const thead = document.createElement('thead');
+            const tbody = document.createElement('tbody');
+
+            // Create header row
+            const headerRow = document.createElement('tr');
+            Object.keys(results.data_preview[0]).forEach(key => {
+                const th = document.createElement('th');
+                th.textContent = key;
+                headerRow.appendChild(th);
+            });
+            thead.appendChild(headerRow);
+
+            // Create body rows
+            results.data_preview.forEach(rowData => {
+                const row = document.createElement('tr');
+                Object.values(rowData).forEach(value => {
+                    const td = document.createElement('td');
+                    td.textContent = value;
+                    row.appendChild(td);
                 });
+                tbody.appendChild(row);
+            });
 
-                if (!response.ok) {
-                    const errorText = await response.text();
-                    throw new Error(`Server error: ${response.status} ${response.statusText}. ${errorText}`);
-                }
+            table.appendChild(thead);
+            table.appendChild(tbody);
 
-                const results = await response.json();
+            dataTableContainer.innerHTML = ''; // Clear placeholder
+            dataTableContainer.appendChild(table);
+        }
 
-                if (results.error) {
-                    alert('Error: ' + results.error);
-                } else {
-                    accuracySpan.textContent = (results.test_accuracy * 100).toFixed(2) + '%';
+        resultsDiv.style.display = 'block';
+    }
 
-                    // Render the confusion matrix
-                    if (results.confusion_matrix && results.class_labels) {
-                        renderConfusionMatrix(results.confusion_matrix, results.class_labels);
-                    }
-                    
-                    // Render the data table
-                    if (results.data_preview && results.data_preview.length > 0) {
-                        const table = document.createElement('table');
-                        const thead = document.createElement('thead');
-                        const tbody = document.createElement('tbody');
-                        
-                        // Create header row
-                        const headerRow = document.createElement('tr');
-                        Object.keys(results.data_preview[0]).forEach(key => {
-                            const th = document.createElement('th');
-                            th.textContent = key;
-                            headerRow.appendChild(th);
-                        });
-                        thead.appendChild(headerRow);
-
-                        // Create body rows
-                        results.data_preview.forEach(rowData => {
-                            const row = document.createElement('tr');
-                            Object.values(rowData).forEach(value => {
-                                const td = document.createElement('td');
-                                td.textContent = value;
-                                row.appendChild(td);
-                            });
-                            tbody.appendChild(row);
-                        });
-
-                        table.appendChild(thead);
-                        table.appendChild(tbody);
-                        
-                        dataTableContainer.innerHTML = ''; // Clear placeholder
-                        dataTableContainer.appendChild(table);
-                    }
+    if (analysisForm) {
+        analysisForm.addEventListener('submit', function(event) {
+            event.preventDefault();
 
-                    resultsDiv.style.display = 'block';
-                }
-            } catch (error) {
-                console.error('An error occurred:', error);
-                alert('An unexpected error occurred: ' + error.message);
-            } finally {
-                loader.style.display = 'none';
-            }
+            const formData = new FormData(event.target);
+            runAnalysis(() => fetch('/analyze', {
+                method: 'POST',
+                body: formData
+            }));
         });
     }
 
+    // "Try it" buttons: precomputed results for the built-in sample datasets
+    document.querySelectorAll('[data-sample]').forEach(button => {
+        button.addEventListener('click', () => {
+            runAnalysis(() => fetch(`/samples/${encodeURIComponent(button.dataset.sample)}/analyze`));
+        });
+    });
+
     function getChartColors() {
         const isDarkMode = body.classList.contains('dark-mode');
         return {
@@ -0,0 +1,137 @@
+import argparse
+import gzip
+import hashlib
+import os
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+# Only text assets benefit from compression; images are already compressed
+COMPRESSIBLE_EXTENSIONS = (".css", ".js", ".html", ".svg", ".json", ".txt")
+
+# Suffix of the precompressed variant for each Content-Encoding, in order of preference
+PRECOMPRESSED_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+_hash_cache = {}
+
+
+def content_hash(path: str) -> str:
+    """
+    Returns a short hash of a file's contents, cached until its mtime changes.
+    Used as the fingerprint in static asset URLs.
+    """
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return ""
+
+    cached = _hash_cache.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(64 * 1024), b""):
+            digest.update(chunk)
+    fingerprint = digest.hexdigest()[:12]
+    _hash_cache[path] = (mtime, fingerprint)
+    return fingerprint
+
+
+def is_up_to_date(source: str, variant: str) -> bool:
+    """True when a precompressed variant exists and is not older than its source."""
+    try:
+        return os.path.getmtime(variant) >= os.path.getmtime(source)
+    except OSError:
+        return False
+
+
+def accepted_encodings(accept_encoding: str) -> set:
+    """Parses an Accept-Encoding header, ignoring encodings sent with q=0."""
+    encodings = set()
+    for part in (accept_encoding or "").split(","):
+        name, *params = part.split(";")
+        name = name.strip().lower()
+        quality = 1.0
+        for param in params:
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name and quality > 0:
+            encodings.add(name)
+    return encodings
+
+
+def pick_encoding(accept_encoding: str, available) -> str:
+    """Returns the preferred encoding that is both accepted and available, or None."""
+    accepted = accepted_encodings(accept_encoding)
+    for encoding in PRECOMPRESSED_SUFFIXES:
+        if encoding in available and (encoding in accepted or "*" in accepted):
+            return encoding
+    return None
+
+
+def runtime_encodings() -> tuple:
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    # Fast settings: this runs on the request thread for dynamic responses
+    if encoding == "br":
+        return brotli.compress(data, quality=4)
+    return gzip.compress(data, compresslevel=6)
+
+
+def precompress_directory(directory: str) -> list:
+    """
+    Writes .gz (and .br when brotli is installed) next to every compressible
+    file in directory, skipping variants that are already up to date.
+    Returns the paths that were written.
+    """
+    written = []
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if not name.endswith(COMPRESSIBLE_EXTENSIONS):
+                continue
+            source = os.path.join(root, name)
+            with open(source, "rb") as handle:
+                data = handle.read()
+
+            for encoding, suffix in PRECOMPRESSED_SUFFIXES.items():
+                if encoding == "br" and brotli is None:
+                    continue
+                target = source + suffix
+                if is_up_to_date(source, target):
+                    continue
+                # Build-time variants can afford the slowest, smallest settings
+                if encoding == "br":
+                    compressed = brotli.compress(data, quality=11)
+                else:
+                    compressed = gzip.compress(data, compresslevel=9, mtime=0)
+                with open(target, "wb") as handle:
+                    handle.write(compressed)
+                written.append(target)
+    return written
+
+
+def main():
+    """
+    Precompresses the static assets so they can be served without
+    compressing on every request. Run at image build time.
+    """
+    parser = argparse.ArgumentParser(description="Write .gz/.br variants of static assets.")
+    parser.add_argument("directory", nargs="?", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "static"),
+                        help="Static directory to precompress. Defaults to ./static.")
+    args = parser.parse_args()
+
+    written = precompress_directory(args.directory)
+    print(f"Wrote {len(written)} precompressed files{'' if brotli else ' (brotli not installed, gzip only)'}.")
+
+
+if __name__ == "__main__":
+    main()
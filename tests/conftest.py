@@ -0,0 +1,35 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+# app reads its configuration at import time
+DATABASE_PATH = os.path.join(tempfile.mkdtemp(prefix="app-tests-"), "test.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DATABASE_PATH}"
+
+with open(os.path.join(REPO_DIR, "Rice_Cammeo_Osmancik.csv"), "rb") as handle:
+    RICE_CSV = handle.read()
+
+
+@pytest.fixture(scope="session")
+def app_module():
+    import app
+
+    return app
+
+
+@pytest.fixture(scope="session")
+def api_headers(app_module):
+    with app_module.app.app_context():
+        app_module.db.create_all()
+        user = app_module.User("Test User", "tests@example.com", app_module.hash_password("password"))
+        app_module.db.session.add(user)
+        app_module.db.session.commit()
+        key = app_module.APIKey(user.id)
+        app_module.db.session.add(key)
+        app_module.db.session.commit()
+        return {"Authorization": f"Bearer {key.key}"}
@@ -0,0 +1,37 @@
+import gzip
+import io
+import json
+import zipfile
+
+from conftest import RICE_CSV
+
+
+def post_batch(app_module, api_headers, data):
+    client = app_module.app.test_client()
+    response = client.post("/api/analyze/batch", headers=api_headers, data=data)
+    assert response.status_code == 200
+    return [json.loads(line) for line in response.data.decode().splitlines()]
+
+
+def test_gzip_csv_upload(app_module, api_headers):
+    lines = post_batch(app_module, api_headers, {"datasets": [(io.BytesIO(gzip.compress(RICE_CSV)), "rice.csv.gz")]})
+    assert lines[0]["status"] == "ok", lines[0]
+    assert lines[-1]["summary"]["succeeded"] == 1
+
+
+def test_zip_members_are_streamed_and_size_checked(app_module, api_headers, monkeypatch):
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w", compression=zipfile.ZIP_DEFLATED) as zip_file:
+        zip_file.writestr("rice.csv", RICE_CSV)
+        zip_file.writestr("rice.csv.gz", gzip.compress(RICE_CSV))
+    archive = archive.getvalue()
+
+    lines = post_batch(app_module, api_headers, {"archive": (io.BytesIO(archive), "datasets.zip")})
+    assert [line["status"] for line in lines[:-1]] == ["ok", "ok"]
+
+    # A member bigger than the budget is refused without being decompressed
+    monkeypatch.setattr(app_module, "memory_budget_bytes", lambda: len(RICE_CSV) // 2)
+    lines = post_batch(app_module, api_headers, {"archive": (io.BytesIO(archive), "datasets.zip")})
+    by_name = {line["filename"]: line for line in lines[:-1]}
+    assert by_name["rice.csv"]["status"] == "error"
+    assert "limit" in by_name["rice.csv"]["error"]
@@ -0,0 +1,33 @@
+import io
+
+import pytest
+
+from conftest import RICE_CSV
+from dataset_reader import ColumnSelectionError, select_columns
+
+NAMES = ["Area", "Perimeter", "Label", "Class"]
+NUMERIC = {"Area", "Perimeter"}
+
+
+def test_default_selection_uses_numeric_features_and_last_column():
+    assert select_columns(NAMES, NUMERIC) == ["Area", "Perimeter", "Class"]
+
+
+@pytest.mark.parametrize("selection", [
+    {"include": ["Class"]},
+    {"exclude": ["Area", "Perimeter"]},
+    {"target": "Area", "exclude": ["Perimeter"]},
+])
+def test_selection_without_features_is_rejected(selection):
+    with pytest.raises(ColumnSelectionError):
+        select_columns(NAMES, NUMERIC, selection)
+
+
+def test_analyze_without_features_is_a_client_error(app_module, api_headers):
+    client = app_module.app.test_client()
+    response = client.post(
+        "/api/analyze?include=Class", headers=api_headers,
+        data={"dataset": (io.BytesIO(RICE_CSV), "rice.csv")},
+    )
+    assert response.status_code == 400
+    assert response.get_json()["error"] == "Invalid column selection"
@@ -0,0 +1,106 @@
+import io
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import RICE_CSV
+from logistics_runner import LogisticsRunner, column_moments, merge_moments
+
+RICE = pd.read_csv(io.BytesIO(RICE_CSV))
+FIRST_ROWS = 3000
+
+
+def stored_state(data, **kwargs):
+    # History keeps model_state as JSON
+    results = LogisticsRunner(data=data, track_rows=True, **kwargs).run_experiment()
+    return json.loads(json.dumps(results["model_state"]))
+
+
+def full_pass_moments(data):
+    return column_moments(data[data.columns[:-1]])
+
+
+@pytest.fixture(scope="module")
+def first_state():
+    return stored_state(RICE.head(FIRST_ROWS))
+
+
+@pytest.mark.parametrize("split", [1, 1000, len(RICE) - 1])
+def test_merged_moments_match_a_full_pass(split):
+    values = RICE[RICE.columns[:-1]]
+    merged = merge_moments(column_moments(values.iloc[:split]), column_moments(values.iloc[split:]))
+    full = column_moments(values)
+    assert merged["count"] == full["count"]
+    np.testing.assert_allclose(merged["mean"], full["mean"], rtol=1e-12)
+    np.testing.assert_allclose(merged["m2"], full["m2"], rtol=1e-9)
+
+
+def test_merging_an_empty_partition_keeps_the_moments():
+    moments = column_moments(RICE[RICE.columns[:-1]])
+    empty = {"count": 0, "mean": np.zeros(len(moments["mean"])), "m2": np.zeros(len(moments["m2"]))}
+    assert merge_moments(moments, empty) is moments
+
+
+def test_untracked_runs_skip_fingerprinting():
+    state = LogisticsRunner(data=RICE.iloc[::4]).run_experiment()["model_state"]
+    assert state["row_count"] is None
+    assert state["row_hash"] is None
+
+
+def test_grown_upload_reuses_statistics_and_warm_starts(first_state):
+    runner = LogisticsRunner(data=RICE, previous_state=first_state)
+    results = runner.run_experiment()
+
+    assert results["incremental"] == {"warm_start": True, "reused_rows": FIRST_ROWS, "new_rows": len(RICE) - FIRST_ROWS}
+    assert results["solver"]["reason"] == "warm start from previous run"
+    normalization = results["model_state"]["normalization"]
+    full = full_pass_moments(RICE)
+    assert normalization["count"] == full["count"]
+    np.testing.assert_allclose(normalization["mean"], full["mean"], rtol=1e-12)
+    np.testing.assert_allclose(normalization["m2"], full["m2"], rtol=1e-9)
+    assert results["model_state"]["row_count"] == len(RICE)
+
+
+def test_edited_rows_are_rescanned_but_still_warm_start(first_state):
+    edited = RICE.copy()
+    edited.loc[0, "Area"] += 1
+    results = LogisticsRunner(data=edited, previous_state=first_state).run_experiment()
+
+    assert results["incremental"]["reused_rows"] == 0
+    assert results["incremental"]["warm_start"] is True
+    np.testing.assert_allclose(results["model_state"]["normalization"]["mean"], full_pass_moments(edited)["mean"])
+
+
+def test_imputation_forces_a_full_pass(first_state):
+    with_gap = RICE.copy()
+    with_gap.loc[len(RICE) - 1, "Area"] = np.nan
+    results = LogisticsRunner(data=with_gap, previous_state=first_state).run_experiment()
+    assert results["incremental"]["reused_rows"] == 0
+
+
+def test_changed_schema_cold_starts(first_state):
+    results = LogisticsRunner(data=RICE.drop(columns=["Area"]), previous_state=first_state).run_experiment()
+    assert "incremental" not in results
+    assert results["solver"]["reason"] != "warm start from previous run"
+
+
+@pytest.mark.parametrize("change, reason", [
+    (lambda state: state.update(class_labels=["a", "b"]), "target classes changed"),
+    (lambda state: state["solver"].update(name="liblinear"), "previous solver does not support warm start"),
+])
+def test_warm_start_fallbacks(first_state, change, reason):
+    state = json.loads(json.dumps(first_state))
+    change(state)
+    results = LogisticsRunner(data=RICE, previous_state=state).run_experiment()
+    assert results["incremental"]["warm_start"] is False
+    assert results["incremental"]["reason"] == reason
+    # The statistics are still reused; only the coefficients start over
+    assert results["incremental"]["reused_rows"] == FIRST_ROWS
+
+
+def test_search_cold_starts(first_state):
+    results = LogisticsRunner(data=RICE, previous_state=first_state).run_experiment(search_budget=2)
+    assert results["incremental"]["warm_start"] is False
+    assert results["incremental"]["reason"] == "hyperparameter search requested"
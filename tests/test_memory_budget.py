@@ -0,0 +1,89 @@
+import io
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pytest
+
+from conftest import RICE_CSV
+from dataset_reader import read_dataset
+from memory_budget import MemoryBudgetExceeded, columnar_row_count, plan_dataset_read
+
+
+def arrow_file(copies=10, batch_rows=1000):
+    data = pd.concat([pd.read_csv(io.BytesIO(RICE_CSV))] * copies, ignore_index=True)
+    table = pa.Table.from_pandas(data, preserve_index=False)
+    sink = io.BytesIO()
+    with ipc.new_file(sink, table.schema) as writer:
+        for batch in table.to_batches(max_chunksize=batch_rows):
+            writer.write_batch(batch)
+    return data, sink.getvalue()
+
+
+class CountingReader:
+    """Wraps an IPC file reader and records which record batches were decoded."""
+
+    def __init__(self, reader, decoded):
+        self.reader = reader
+        self.decoded = decoded
+
+    def get_batch(self, i):
+        self.decoded.append(i)
+        return self.reader.get_batch(i)
+
+    def __getattr__(self, name):
+        return getattr(self.reader, name)
+
+
+@pytest.fixture
+def decoded_batches(monkeypatch):
+    decoded = []
+    open_file = ipc.open_file
+    monkeypatch.setattr(ipc, "open_file", lambda *args, **kwargs: CountingReader(open_file(*args, **kwargs), decoded))
+    return decoded
+
+
+def test_arrow_sniff_stops_after_nrows(decoded_batches):
+    data, raw = arrow_file()
+    sample = read_dataset(io.BytesIO(raw), "rice.arrow", nrows=1500)
+    assert len(sample) == 1500
+    assert decoded_batches == [0, 1]
+    pd.testing.assert_frame_equal(sample, data.head(1500))
+
+
+def test_arrow_full_read_applies_selection():
+    data, raw = arrow_file(copies=1)
+    selected = read_dataset(io.BytesIO(raw), "rice.arrow", selection={"target": "Area", "include": ["Perimeter"]})
+    assert list(selected.columns) == ["Perimeter", "Area"]
+    assert len(selected) == len(data)
+
+
+def test_arrow_row_count_stops_past_row_limit(decoded_batches, monkeypatch):
+    monkeypatch.setattr("memory_budget.ROW_LIMIT", 2500)
+    _, raw = arrow_file()
+    assert columnar_row_count(io.BytesIO(raw), "arrow") == 3000
+    assert decoded_batches == [0, 1, 2]
+
+
+def test_reservations_shrink_the_budget_for_concurrent_jobs(app_module, monkeypatch):
+    plan = plan_dataset_read(io.BytesIO(RICE_CSV), "rice.csv", budget_bytes=None)
+    # Room for one full run and a downsampled second one, but not a third
+    budget = plan["estimated_bytes"] + plan["estimated_bytes"] // 2
+    monkeypatch.setattr(app_module, "memory_budget_bytes", lambda: budget)
+
+    with app_module.read_upload_within_budget(io.BytesIO(RICE_CSV), "rice.csv") as (_, first):
+        assert first["decision"] == "accept"
+        with app_module.read_upload_within_budget(io.BytesIO(RICE_CSV), "rice.csv") as (_, second):
+            assert second["decision"] == "downsample"
+            assert second["budget_bytes"] == budget - first["estimated_bytes"]
+            with pytest.raises(MemoryBudgetExceeded):
+                with app_module.read_upload_within_budget(io.BytesIO(RICE_CSV), "rice.csv"):
+                    pass
+    assert app_module.memory_reserved_bytes == 0
+
+
+def test_profile_goes_through_the_budget(app_module, api_headers, monkeypatch):
+    monkeypatch.setattr(app_module, "memory_budget_bytes", lambda: 1024)
+    client = app_module.app.test_client()
+    response = client.post("/api/profile", headers=api_headers, data={"dataset": (io.BytesIO(RICE_CSV), "rice.csv")})
+    assert response.status_code == 413
@@ -0,0 +1,37 @@
+import pytest
+
+from usage_tracker import UsageTracker
+
+
+def usage_summary(app_module, api_key_id):
+    with app_module.app.app_context():
+        key = app_module.db.session.get(app_module.APIKey, api_key_id)
+        return app_module.key_usage_summaries([key], hours=24)[api_key_id]
+
+
+def test_flushes_add_to_one_row_per_bucket(app_module, api_headers):
+    with app_module.app.app_context():
+        api_key_id = app_module.APIKey.query.filter_by(key=api_headers["Authorization"].split()[-1]).one().id
+    # Other tests' requests are counted too
+    before = usage_summary(app_module, api_key_id)
+
+    # Two trackers stand in for two gunicorn workers sharing the database
+    workers = [UsageTracker(bucket_seconds=3600, flush_interval=3600) for _ in range(2)]
+    for tracker in workers:
+        tracker.writer = app_module.write_usage
+    for _ in range(3):
+        for tracker in workers:
+            tracker.record_request(api_key_id, latency_ms=40, bytes_uploaded=100)
+            tracker.record_work(api_key_id, rows=10, training_seconds=0.5)
+            tracker.flush()
+    for tracker in workers:
+        tracker._stop.set()
+
+    with app_module.app.app_context():
+        buckets = [row.bucket_start for row in app_module.APIKeyUsage.query.filter_by(api_key_id=api_key_id)]
+    assert len(buckets) == len(set(buckets))
+    after = usage_summary(app_module, api_key_id)
+    assert after["request_count"] - before["request_count"] == 6
+    assert after["bytes_uploaded"] - before["bytes_uploaded"] == 600
+    assert after["rows_processed"] - before["rows_processed"] == 60
+    assert after["training_seconds"] - before["training_seconds"] == pytest.approx(3.0)
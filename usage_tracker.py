@@ -0,0 +1,173 @@
+import bisect
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open-ended.
+# Histograms with fixed bounds can be summed across buckets and workers,
+# which raw percentiles cannot.
+LATENCY_BOUNDS_MS = [10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000]
+
+
+def bucket_start(timestamp: float, bucket_seconds: int) -> datetime:
+    start = int(timestamp // bucket_seconds) * bucket_seconds
+    # Naive UTC, matching the datetime.utcnow() defaults used by the models
+    return datetime.fromtimestamp(start, tz=timezone.utc).replace(tzinfo=None)
+
+
+def empty_counters() -> dict:
+    return {
+        "request_count": 0,
+        "bytes_uploaded": 0,
+        "rows_processed": 0,
+        "training_seconds": 0.0,
+        "error_count": 0,
+        "latency_histogram": [0] * (len(LATENCY_BOUNDS_MS) + 1),
+    }
+
+
+def merge_counters(total: dict, counters: dict) -> dict:
+    for field in ("request_count", "bytes_uploaded", "rows_processed", "training_seconds", "error_count"):
+        total[field] += counters[field] or 0
+    for index, count in enumerate(counters["latency_histogram"] or []):
+        total["latency_histogram"][index] += count
+    return total
+
+
+def histogram_percentile(histogram: list, percentile: float):
+    """
+    Returns the upper bound (ms) of the bucket holding the given percentile,
+    or None when there are no samples. Open-ended samples report the last bound.
+    """
+    total = sum(histogram)
+    if total == 0:
+        return None
+    rank = percentile / 100 * total
+    seen = 0
+    for index, count in enumerate(histogram):
+        seen += count
+        if seen >= rank:
+            return LATENCY_BOUNDS_MS[min(index, len(LATENCY_BOUNDS_MS) - 1)]
+    return LATENCY_BOUNDS_MS[-1]
+
+
+def summarize(counters: dict) -> dict:
+    histogram = counters["latency_histogram"]
+    return {
+        "request_count": counters["request_count"],
+        "bytes_uploaded": counters["bytes_uploaded"],
+        "rows_processed": counters["rows_processed"],
+        "training_seconds": round(counters["training_seconds"], 3),
+        "error_count": counters["error_count"],
+        "latency_ms": {
+            "p50": histogram_percentile(histogram, 50),
+            "p95": histogram_percentile(histogram, 95),
+            "p99": histogram_percentile(histogram, 99),
+        },
+    }
+
+
+class UsageTracker:
+    """
+    Aggregates per-API-key usage in memory, keyed by (api_key_id, time bucket),
+    and hands the accumulated buckets to a writer every flush_interval seconds
+    instead of writing to the database on every request.
+    """
+
+    def __init__(self, bucket_seconds: int = 3600, flush_interval: float = 60, max_failed_flushes: int = 5):
+        self.bucket_seconds = bucket_seconds
+        self.flush_interval = flush_interval
+        # Consecutive failed flushes after which the queued counts are dropped,
+        # so a broken writer can't grow the queue without bound
+        self.max_failed_flushes = max_failed_flushes
+        self.failed_flushes = 0
+        self.writer = None
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._last_used = {}
+        self._flusher = None
+        self._stop = threading.Event()
+
+    def _counters(self, api_key_id, now):
+        key = (api_key_id, bucket_start(now, self.bucket_seconds))
+        counters = self._pending.get(key)
+        if counters is None:
+            counters = self._pending[key] = empty_counters()
+        return counters
+
+    def record_request(self, api_key_id, latency_ms: float, bytes_uploaded: int = 0, error: bool = False):
+        now = time.time()
+        with self._lock:
+            counters = self._counters(api_key_id, now)
+            counters["request_count"] += 1
+            counters["bytes_uploaded"] += bytes_uploaded or 0
+            counters["error_count"] += 1 if error else 0
+            counters["latency_histogram"][bisect.bisect_left(LATENCY_BOUNDS_MS, latency_ms)] += 1
+            self._last_used[api_key_id] = bucket_start(now, 1)
+        self._ensure_flusher()
+
+    def record_work(self, api_key_id, rows: int = 0, training_seconds: float = 0.0, errors: int = 0):
+        with self._lock:
+            counters = self._counters(api_key_id, time.time())
+            counters["rows_processed"] += rows or 0
+            counters["training_seconds"] += training_seconds or 0.0
+            counters["error_count"] += errors
+        self._ensure_flusher()
+
+    def pending_for(self, api_key_ids) -> dict:
+        """Returns this process's unflushed counters, merged per key."""
+        ids = set(api_key_ids)
+        merged = {}
+        with self._lock:
+            for (api_key_id, _), counters in self._pending.items():
+                if api_key_id in ids:
+                    merge_counters(merged.setdefault(api_key_id, empty_counters()), counters)
+        return merged
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            last_used, self._last_used = self._last_used, {}
+        if not pending or self.writer is None:
+            return
+        try:
+            self.writer(pending, last_used)
+        except Exception:
+            self.failed_flushes += 1
+            if self.failed_flushes >= self.max_failed_flushes:
+                logger.exception(
+                    "Failed to flush API key usage %d times in a row; dropping %d buckets",
+                    self.failed_flushes, len(pending),
+                )
+                self.failed_flushes = 0
+                return
+            logger.exception("Failed to flush API key usage; re-queueing %d buckets", len(pending))
+            # Put the counts back so the next flush retries them
+            with self._lock:
+                for key, counters in pending.items():
+                    merge_counters(self._pending.setdefault(key, empty_counters()), counters)
+                for api_key_id, used_at in last_used.items():
+                    self._last_used[api_key_id] = max(used_at, self._last_used.get(api_key_id, used_at))
+        else:
+            self.failed_flushes = 0
+
+    def stop(self):
+        self._stop.set()
+        self.flush()
+
+    def _ensure_flusher(self):
+        # Started lazily so each gunicorn worker gets its own thread after fork
+        if self._flusher is not None and self._flusher.is_alive():
+            return
+        with self._lock:
+            if self._flusher is not None and self._flusher.is_alive():
+                return
+            self._flusher = threading.Thread(target=self._run, name="usage-flusher", daemon=True)
+            self._flusher.start()
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()